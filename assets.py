@@ -0,0 +1,235 @@
+# assets.py
+"""
+Statik dosya hattı. static/ altındaki dosyalar içerik özetiyle adlandırılarak
+(ör. options-sidebar.3f2a9c1b7d.css) derleme klasörüne kopyalanır ve gzip
+(brotli kuruluysa br) olarak önceden sıkıştırılır. Şablonlar bu adlara
+`asset_url()` ile ulaşır; ad içerikle değiştiği için dosyalar `immutable`
+olarak sunulur. HTML/JSON yanıtları ise CompressionMiddleware ile sıkıştırılır.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import stat
+from pathlib import Path
+from typing import Dict, Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # isteğe bağlı; yoksa yalnızca gzip üretilir
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+STATIC_DIR = BASE_DIR / "static"
+ASSET_BUILD_DIR = Path(os.getenv("ASSET_BUILD_DIR", str(BASE_DIR / "cache" / "assets")))
+ASSET_URL_PREFIX = "/assets"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Zaten sıkıştırılmış biçimler yeniden sıkıştırılmaz
+_COMPRESSIBLE_SUFFIXES = {".css", ".js", ".mjs", ".json", ".svg", ".txt", ".html", ".map", ".xml", ".ico"}
+_MIN_COMPRESS_SIZE = 256
+# Tercih sırasına göre (kodlama, dosya uzantısı)
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _fingerprinted_name(relative: Path, digest: str) -> Path:
+    return relative.with_name(f"{relative.stem}.{digest[:10]}{relative.suffix}")
+
+
+def _write_if_missing(path: Path, data: bytes) -> None:
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class AssetManifest:
+    """
+    Mantıksal yol (ör. "options-sidebar.css") -> özetli yol eşlemesi.
+    """
+
+    def __init__(self, source_dir: Path, build_dir: Path) -> None:
+        self.source_dir = source_dir
+        self.build_dir = build_dir
+        self.files: Dict[str, str] = {}
+        self.version = ""
+
+    def build(self) -> "AssetManifest":
+        """
+        Özetli kopyaları ve sıkıştırılmış varyantları üretir. İçerik adresli
+        olduğu için tekrar çalıştırmak yalnızca değişen dosyaları yazar.
+        """
+        files: Dict[str, str] = {}
+        for path in sorted(self.source_dir.rglob("*")):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            relative = path.relative_to(self.source_dir)
+            data = path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            target = _fingerprinted_name(relative, digest)
+            dest = self.build_dir / target
+            _write_if_missing(dest, data)
+            if path.suffix.lower() in _COMPRESSIBLE_SUFFIXES and len(data) >= _MIN_COMPRESS_SIZE:
+                # mtime=0: aynı içerik her derlemede aynı .gz baytlarını verir
+                _write_if_missing(dest.with_name(dest.name + ".gz"), gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write_if_missing(dest.with_name(dest.name + ".br"), brotli.compress(data, quality=11))
+            files[relative.as_posix()] = target.as_posix()
+        self.files = files
+        self.version = hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        _write_if_missing(self.build_dir / f"manifest.{self.version}.json", json.dumps(files, indent=2).encode("utf-8"))
+        return self
+
+    def url(self, path: str) -> str:
+        target = self.files.get(path.lstrip("/"))
+        if target is None:
+            # Derlemede olmayan dosya: özetsiz adresten (revalidate ile) sunulur
+            logger.warning("Asset manifest'te yok: %s", path)
+            return f"/static/{path.lstrip('/')}"
+        return f"{ASSET_URL_PREFIX}/{target}"
+
+
+def _accepted_encodings(scope: Scope) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for item in Headers(scope=scope).get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def _accepts(accepted: Dict[str, float], encoding: str) -> bool:
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Özetli asset'leri sunar; istemci kabul ediyorsa önceden sıkıştırılmış
+    .br/.gz varyantını Content-Encoding ile döndürür.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        accepted = _accepted_encodings(scope)
+        for encoding, suffix in _ENCODINGS:
+            if not _accepts(accepted, encoding):
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                # Content-Type, .gz/.br uzantısı atlanarak asıl dosya adından tahmin edilir
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Encoding"] = encoding
+                break
+        else:
+            response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            MutableHeaders(raw=response.raw_headers).add_vary_header("Accept-Encoding")
+        return response
+
+
+def _is_compressible(content_type: str) -> bool:
+    media = content_type.split(";", 1)[0].strip().lower()
+    return media.startswith("text/") or media in {
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+    }
+
+
+class CompressionMiddleware:
+    """
+    Metin yanıtlarını (HTML, JSON, CSS vb.) gzip ile, istemci kabul ediyor ve
+    brotli kuruluysa br ile sıkıştırır. Yalnızca tek parça gövdeli yanıtlara
+    uygulanır; akış yanıtları (CSV, ZIP) ve zaten kodlanmış yanıtlar olduğu
+    gibi geçer. Sıkıştırılan yanıtın ETag'i zayıf (W/) hale getirilir.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose(self, scope: Scope) -> Optional[str]:
+        accepted = _accepted_encodings(scope)
+        if brotli is not None and _accepts(accepted, "br"):
+            return "br"
+        if _accepts(accepted, "gzip"):
+            return "gzip"
+        return None
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or not _is_compressible(headers.get("content-type", "")):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            assert start is not None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Akış yanıtı ya da küçük gövde: sıkıştırmadan devam
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            compressed = self._compress(encoding, body)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            await send(start)
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def build_assets(source_dir: Path = STATIC_DIR, build_dir: Path = ASSET_BUILD_DIR) -> AssetManifest:
+    return AssetManifest(source_dir, build_dir).build()
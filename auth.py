@@ -1,7 +1,12 @@
+import asyncio
 import os
-from typing import Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
 
-from fastapi import Request
+from fastapi import HTTPException, Request
 from itsdangerous import BadSignature, SignatureExpired, TimestampSigner
 from passlib.context import CryptContext
 
@@ -10,9 +15,24 @@ SESSION_COOKIE_NAME = os.getenv("SESSION_COOKIE_NAME", "session")
 SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", str(60 * 60 * 24 * 7)))
 SECURE_COOKIES = os.getenv("SESSION_COOKIE_SECURE", "false").lower() == "true"
 
-_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt maliyeti; daha düşük maliyetle üretilmiş hash'ler başarılı girişte yenilenir
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+_pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
 _signer = TimestampSigner(SECRET_KEY)
 
+T = TypeVar("T")
+
 
 def hash_password(password: str) -> str:
     return _pwd_context.hash(password)
@@ -22,6 +42,84 @@ def verify_password(password: str, password_hash: str) -> bool:
     return _pwd_context.verify(password, password_hash)
 
 
+class PasswordHashPool:
+    """
+    bcrypt işleri için ayrı, boyutu sınırlı thread havuzu. Starlette'in genel
+    thread havuzunu ve public /t/ okutmalarını aç bırakmamak için girişler
+    burada sıraya girer; kuyruk doluysa ya da süre aşılırsa 503 döner.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float) -> None:
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.pending = 0  # çalışan + kuyrukta bekleyen
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _call(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Sunucu yoğun, lütfen biraz sonra tekrar deneyin.")
+            self.pending += 1
+        future = self._executor.submit(self._call, fn, *args)
+        # Slot, iş gerçekten bittiğinde (zaman aşımı olsa bile) bırakılır
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise HTTPException(status_code=503, detail="Parola doğrulaması zaman aşımına uğradı.")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queue_depth": max(0, self.pending - self.running),
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE, PASSWORD_HASH_TIMEOUT)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(_pwd_context.hash, password)
+
+
+async def verify_password_async(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    (geçerli mi, yeni hash) döndürür. Hash eski maliyetle üretilmişse ikinci
+    değer güncel maliyetle yeniden üretilmiş hash'tir; kaydedilmelidir.
+    """
+    return await password_pool.run(_pwd_context.verify_and_update, password, password_hash)
+
+
 def set_session_cookie(response, user_id: int) -> None:
     token = _signer.sign(str(user_id)).decode("utf-8")
     response.set_cookie(
@@ -38,12 +136,107 @@ def clear_session_cookie(response) -> None:
     response.delete_cookie(SESSION_COOKIE_NAME)
 
 
-def get_current_user_id(request: Request) -> Optional[int]:
-    token = request.cookies.get(SESSION_COOKIE_NAME)
+def _unsign_user_id(token: Optional[str]) -> Optional[int]:
     if not token:
         return None
     try:
         raw = _signer.unsign(token, max_age=SESSION_MAX_AGE)
         return int(raw.decode("utf-8"))
-    except (BadSignature, SignatureExpired):
-        return None
\ No newline at end of file
+    except (BadSignature, SignatureExpired, ValueError):
+        return None
+
+
+def get_current_user_id(request: Request) -> Optional[int]:
+    # Middleware çözdüyse tekrar imza doğrulaması yapma
+    state = request.scope.get("state") or {}
+    if "user_id" in state:
+        return state["user_id"]
+    return _unsign_user_id(request.cookies.get(SESSION_COOKIE_NAME))
+
+
+# --- İstek kapsamlı kullanıcı bağlamı ---
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    email: str
+    is_admin: bool
+
+
+class UserCache:
+    """
+    Kısa ömürlü (TTL) süreç içi önbellek: kullanıcı id -> CurrentUser.
+    User satırı değiştiğinde invalidate() çağrılmalıdır.
+    """
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: Dict[int, Tuple[float, CurrentUser]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[CurrentUser]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < now:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user: CurrentUser) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] >= now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[user.id] = (time.monotonic() + self.ttl, user)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserCache(USER_CACHE_TTL, USER_CACHE_SIZE)
+
+UserLoader = Callable[[int], Awaitable[Optional[CurrentUser]]]
+
+
+class AuthContextMiddleware:
+    """
+    Oturum çerezini istek başına bir kez çözer ve sonucu request.state'e
+    (user_id, user) yazar. Kullanıcı önce user_cache'ten, yoksa `loader` ile
+    veritabanından yüklenir. Saf ASGI: yanıt akışına dokunmaz.
+    """
+
+    def __init__(self, app, loader: UserLoader) -> None:
+        self.app = app
+        self.loader = loader
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            state = scope.setdefault("state", {})
+            user_id = _unsign_user_id(Request(scope).cookies.get(SESSION_COOKIE_NAME))
+            user: Optional[CurrentUser] = None
+            if user_id is not None:
+                user = user_cache.get(user_id)
+                if user is None:
+                    user = await self.loader(user_id)
+                    if user is not None:
+                        user_cache.put(user)
+            state["user_id"] = user_id
+            state["user"] = user
+        await self.app(scope, receive, send)
+
+
+def get_current_user(request: Request) -> Optional[CurrentUser]:
+    state = request.scope.get("state") or {}
+    return state.get("user")
@@ -0,0 +1,122 @@
+# benchmarks/benchlib.py
+"""
+Benchmark betiklerinin ortak yardımcıları: yalıtılmış çalışma klasörü için
+ortam değişkenleri, gecikme özetleri (p50/p95/p99) ve çalıştırmalar arasında
+karşılaştırılabilen JSON rapor biçimi.
+
+Rapor biçimi:
+    {"kind": "load" | "micro", "meta": {...}, "params": {...},
+     "results": {"<ad>": {"count": .., "rps": .., "p50_ms": .., ...}}}
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+ADMIN_EMAIL = "bench-admin@example.com"
+ADMIN_PASSWORD = "bench-password"
+
+
+def bench_env(workdir: Path) -> Dict[str, str]:
+    """
+    Uygulamanın tüm yazılabilir yollarını (veritabanı, yüklemeler, QR ve
+    asset önbellekleri) çalışma klasörüne yönlendiren ortam değişkenleri.
+    """
+    return {
+        "PYTHONPATH": str(ROOT),
+        "DATABASE_URL": f"sqlite:///{workdir / 'bench.db'}",
+        "UPLOAD_DIR": str(workdir / "uploads"),
+        "QR_CACHE_DIR": str(workdir / "qr"),
+        "ASSET_BUILD_DIR": str(workdir / "assets"),
+        "CLICK_ARCHIVE_DIR": str(workdir / "archive"),
+        "SECRET_KEY": os.getenv("SECRET_KEY", "bench-secret"),
+        "PUBLIC_BASE_URL": os.getenv("PUBLIC_BASE_URL", "https://bench.example.com"),
+        "ADMIN_EMAILS": ADMIN_EMAIL,
+        # Seed edilen admin parolası her girişte bcrypt'i 12 turla beklemesin
+        "BCRYPT_ROUNDS": os.getenv("BCRYPT_ROUNDS", "4"),
+    }
+
+
+def activate(workdir: Path) -> None:
+    """
+    Uygulama modülleri import edilmeden önce çağrılmalıdır; ayarlar import
+    sırasında okunur.
+    """
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.environ.update(bench_env(workdir))
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    En yakın sıra yöntemi; `sorted_values` artan sıralı olmalıdır.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0, **extra) -> Dict:
+    """
+    Saniye cinsinden gecikmelerden rapor satırı üretir (süreler ms).
+    """
+    values = sorted(latencies)
+    count = len(values)
+    row = {
+        "count": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+    row.update(extra)
+    return row
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def write_report(path: Optional[Path], kind: str, params: Dict, results: Dict[str, Dict]) -> Dict:
+    report = {
+        "kind": kind,
+        "meta": {
+            "git": _git_revision(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "params": params,
+        "results": results,
+    }
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return report
+
+
+def print_table(results: Dict[str, Dict]) -> None:
+    print(f"{'ad':<24} {'adet':>7} {'istek/sn':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'hata':>6}")
+    for name, row in results.items():
+        print(
+            f"{name:<24} {row['count']:>7} {row['rps']:>10} {row['p50_ms']:>9} "
+            f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['errors']:>6}"
+        )
@@ -0,0 +1,83 @@
+# benchmarks/compare.py
+"""
+İki benchmark raporunu (load.py / micro.py çıktısı) karşılaştırır. Ortak her
+satır için istek/sn ve p50/p95/p99 değişimini yüzde olarak yazar; gecikmesi
+`--threshold` yüzdesinden fazla artan ya da verimi o kadar düşen satır varsa
+1 ile çıkar (CI'da regresyon kontrolü için).
+
+Kullanım:
+    python benchmarks/compare.py baseline.json results.json --threshold 10
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# (alan, büyük değer iyi mi)
+METRICS = (("rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False))
+
+
+def _change(old: float, new: float) -> Optional[float]:
+    if not old:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """
+    Tabloyu yazdırır ve eşiği aşan regresyonları döndürür.
+    """
+    regressions: List[str] = []
+    names = [name for name in baseline["results"] if name in current["results"]]
+    print(f"{'ad':<24}" + "".join(f"{metric:>23}" for metric, _ in METRICS))
+    for name in names:
+        old_row, new_row = baseline["results"][name], current["results"][name]
+        cells = []
+        for metric, higher_is_better in METRICS:
+            old, new = old_row.get(metric, 0), new_row.get(metric, 0)
+            change = _change(old, new)
+            if change is None:
+                cells.append(f"{new:>23}")
+                continue
+            worse = -change if higher_is_better else change
+            flag = "!" if worse > threshold else " "
+            cells.append(f"{old:>9} -> {new:>9}{flag}")
+            if worse > threshold:
+                regressions.append(f"{name} {metric}: {old} -> {new} ({change:+.1f}%)")
+        if new_row.get("errors", 0) > old_row.get("errors", 0):
+            regressions.append(f"{name} errors: {old_row.get('errors', 0)} -> {new_row['errors']}")
+        print(f"{name:<24}" + "".join(cells))
+
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"\nYeni raporda olmayan satırlar: {', '.join(missing)}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="İzin verilen kötüleşme (%%)")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    if baseline.get("kind") != current.get("kind"):
+        parser.error(f"Farklı rapor türleri: {baseline.get('kind')} / {current.get('kind')}")
+    for label, report in (("önce", baseline), ("sonra", current)):
+        meta = report.get("meta", {})
+        print(f"{label}: {meta.get('git') or '-'} {meta.get('created_at', '')}")
+    print()
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n%{args.threshold:g} eşiğini aşan regresyonlar:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
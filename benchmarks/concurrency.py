@@ -0,0 +1,159 @@
+# benchmarks/concurrency.py
+"""
+Public uçların eşzamanlılık ölçümü. Geçici bir veritabanı hazırlar, uygulamayı
+yerel bir uvicorn sürecinde başlatır ve artan eşzamanlı istemci sayılarıyla
+istek atar. Thread havuzu sınırını (--thread-limit) düşürerek async
+handler'ların bu sınırdan etkilenmediğini görebilirsiniz.
+
+İstemci için httpx gerekir (pip install httpx).
+
+Kullanım:
+    python benchmarks/concurrency.py --levels 1 16 64 256 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+SHORTID = "benchtag"
+OWNER_EMAIL = "bench@example.com"
+OWNER_PASSWORD = "bench-password"
+# Bu önekteki yollar tag sahibinin oturumuyla istenir (istatistik uçları)
+AUTHENTICATED_PREFIXES = ("/api/",)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _seed(workdir: Path) -> None:
+    """
+    Sahipli tek bir tag ve profili olan veritabanını oluşturur.
+    """
+    code = (
+        "from auth import hash_password\n"
+        "from db import init_db, get_session, Tag, User, Profile\n"
+        "init_db()\n"
+        "with get_session() as s:\n"
+        f"    u = User(email='{OWNER_EMAIL}', password_hash=hash_password('{OWNER_PASSWORD}'))\n"
+        "    s.add(u); s.commit(); s.refresh(u)\n"
+        f"    t = Tag(shortid='{SHORTID}', owner_user_id=u.id)\n"
+        "    s.add(t); s.commit(); s.refresh(t)\n"
+        "    s.add(Profile(tag_id=t.id, full_name='Bench User')); s.commit()\n"
+    )
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "BCRYPT_ROUNDS": "4"}
+    subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env, check=True)
+
+
+async def _run_level(client: httpx.AsyncClient, path: str, concurrency: int, total: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "errors": errors,
+    }
+
+
+async def _bench(base_url: str, paths: List[str], levels: List[int], total: int) -> None:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as anonymous, httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30
+    ) as owner:
+        response = await owner.post("/login", data={"email": OWNER_EMAIL, "password": OWNER_PASSWORD})
+        if response.status_code != 303 or "e=invalid" in response.headers.get("location", ""):
+            raise RuntimeError("Tag sahibi girişi başarısız")
+        for path in paths:
+            client = owner if path.startswith(AUTHENTICATED_PREFIXES) else anonymous
+            print(f"\n{path}")
+            print(f"{'eşzamanlı':>10} {'istek/sn':>10} {'p50 ms':>9} {'p99 ms':>9} {'hata':>6}")
+            for level in levels:
+                row = await _run_level(client, path, level, total)
+                print(
+                    f"{row['concurrency']:>10} {row['rps']:>10} {row['p50_ms']:>9} "
+                    f"{row['p99_ms']:>9} {row['errors']:>6}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--requests", type=int, default=2000, help="Her seviye için toplam istek")
+    parser.add_argument("--thread-limit", type=int, default=None, help="AnyIO thread havuzu sınırı")
+    parser.add_argument(
+        "--paths",
+        nargs="+",
+        default=[f"/t/{SHORTID}", f"/api/stats/{SHORTID}?days=30", f"/qr/{SHORTID}"],
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        _seed(workdir)
+        port = _free_port()
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(ROOT),
+            "SECRET_KEY": os.getenv("SECRET_KEY", "bench-secret"),
+            "PUBLIC_BASE_URL": os.getenv("PUBLIC_BASE_URL", "https://bench.example.com"),
+            "QR_CACHE_DIR": str(workdir / "qr"),
+        }
+        launcher = "import uvicorn, main\n"
+        if args.thread_limit:
+            launcher += (
+                "import anyio.to_thread\n"
+                "@main.app.on_event('startup')\n"
+                "async def _limit():\n"
+                f"    anyio.to_thread.current_default_thread_limiter().total_tokens = {args.thread_limit}\n"
+            )
+        launcher += f"uvicorn.run(main.app, host='127.0.0.1', port={port}, log_level='warning')\n"
+        server = subprocess.Popen([sys.executable, "-c", launcher], cwd=workdir, env=env)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            for _ in range(100):
+                try:
+                    httpx.get(f"{base_url}/health", timeout=1)
+                    break
+                except httpx.HTTPError:
+                    time.sleep(0.1)
+            asyncio.run(_bench(base_url, args.paths, args.levels, args.requests))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# benchmarks/load.py
+"""
+Okutma yolunun yük testi. seed.py ile sentetik bir veritabanı hazırlar (ya da
+--workdir ile var olanı kullanır) ve uygulamayı iki şekilde sürer:
+
+- inprocess: httpx ASGITransport ile aynı süreçte; ağ ve sunucu maliyeti
+  olmadan handler + middleware maliyetini ölçer.
+- uvicorn: yerel bir uvicorn sürecine gerçek HTTP bağlantılarıyla.
+
+Her uç için istek/sn ve p50/p95/p99 gecikmeleri `--out` dosyasına yazılır;
+iki çalıştırma compare.py ile karşılaştırılabilir.
+
+Kullanım:
+    python benchmarks/load.py --mode both --concurrency 32 --requests 2000 --out results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from benchlib import activate, bench_env, print_table, summarize, write_report  # noqa: E402
+
+# (metot, yol, form verisi)
+Request = Tuple[str, str, Optional[Dict[str, str]]]
+MOBILE_UA = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1"
+)
+SCENARIOS = ("tag_page", "tag_page_hot", "tag_missing", "qr_png", "api_stats", "api_devices", "admin_qrzip")
+# Giriş gerektiren senaryolar admin oturumuyla çalışır
+AUTHENTICATED_SCENARIOS = ("api_stats", "api_devices", "admin_qrzip")
+ZIP_SIZE = 50
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _scenarios(manifest: Dict, rng: random.Random) -> Dict[str, Tuple[Callable[[], Request], int]]:
+    """
+    Senaryo adı -> (istek üreticisi, beklenen durum kodu).
+    """
+    owned: List[str] = manifest["owned"]
+    hot: List[str] = manifest["hot"]
+    every = owned + manifest["unowned"]
+    return {
+        # Profil önbelleğini aşan geniş hedef kümesi / önbellekte kalan popüler tag'ler
+        "tag_page": (lambda: ("GET", f"/t/{rng.choice(owned)}", None), 200),
+        "tag_page_hot": (lambda: ("GET", f"/t/{rng.choice(hot)}", None), 200),
+        "tag_missing": (lambda: ("GET", f"/t/yok{rng.randrange(10 ** 9)}", None), 404),
+        "qr_png": (lambda: ("GET", f"/qr/{rng.choice(owned)}", None), 200),
+        "api_stats": (lambda: ("GET", f"/api/stats/{rng.choice(hot)}?days=30", None), 200),
+        "api_devices": (lambda: ("GET", f"/api/stats/{rng.choice(hot)}/devices?days=30", None), 200),
+        "admin_qrzip": (
+            lambda: ("POST", "/admin/qrzip", {"ids": " ".join(rng.sample(every, min(ZIP_SIZE, len(every))))}),
+            200,
+        ),
+    }
+
+
+async def _run(
+    client: httpx.AsyncClient, make_request: Callable[[], Request], expected: int, concurrency: int, total: int
+) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, path, data = make_request()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, data=data)
+                if response.status_code != expected:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return summarize(latencies, time.perf_counter() - started, errors, concurrency=concurrency)
+
+
+async def _login(client: httpx.AsyncClient, manifest: Dict) -> None:
+    admin = manifest["admin"]
+    response = await client.post("/login", data={"email": admin["email"], "password": admin["password"]})
+    if response.status_code != 303 or "e=invalid" in response.headers.get("location", ""):
+        raise RuntimeError("Admin girişi başarısız")
+
+
+async def _drive(make_client: Callable[[], httpx.AsyncClient], manifest: Dict, args, mode: str) -> Dict[str, Dict]:
+    rng = random.Random(args.seed)
+    scenarios = _scenarios(manifest, rng)
+    results: Dict[str, Dict] = {}
+    async with make_client() as client, make_client() as admin_client:
+        client.headers["User-Agent"] = MOBILE_UA
+        await _login(admin_client, manifest)
+        for name in args.scenarios:
+            # ZIP istekleri ağır; diğer uçların küçük bir kesriyle sınırlı
+            total = max(5, args.requests // 100) if name == "admin_qrzip" else args.requests
+            concurrency = min(args.concurrency, 4) if name == "admin_qrzip" else args.concurrency
+            target = admin_client if name in AUTHENTICATED_SCENARIOS else client
+            make_request, expected = scenarios[name]
+            if args.warmup:
+                await _run(target, make_request, expected, concurrency, min(args.warmup, total))
+            results[f"{mode}:{name}"] = await _run(target, make_request, expected, concurrency, total)
+            print(f"  {mode}:{name} tamam", file=sys.stderr)
+    return results
+
+
+async def _inprocess(manifest: Dict, args) -> Dict[str, Dict]:
+    # Ortam activate() ile ayarlandı; uygulama ayarları import sırasında okunur
+    import main
+
+    main.on_startup()
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        return await _drive(
+            lambda: httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60),
+            manifest,
+            args,
+            "inprocess",
+        )
+    finally:
+        await main.on_shutdown()
+
+
+def _uvicorn(workdir: Path, manifest: Dict, args) -> Dict[str, Dict]:
+    port = _free_port()
+    launcher = f"import uvicorn, main\nuvicorn.run(main.app, host='127.0.0.1', port={port}, log_level='warning')\n"
+    server = subprocess.Popen([sys.executable, "-c", launcher], cwd=workdir, env={**os.environ, **bench_env(workdir)})
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(200):
+            try:
+                httpx.get(f"{base_url}/health", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("uvicorn başlamadı")
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        return asyncio.run(
+            _drive(lambda: httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60), manifest, args, "uvicorn")
+        )
+    finally:
+        server.terminate()
+        server.wait(timeout=15)
+
+
+def _prepare(workdir: Path, args) -> Dict:
+    manifest_path = workdir / "seed.json"
+    if not manifest_path.exists():
+        command = [
+            sys.executable,
+            str(Path(__file__).with_name("seed.py")),
+            "--workdir", str(workdir),
+            "--tags", str(args.tags),
+            "--profiles", str(args.profiles),
+            "--clicks", str(args.clicks),
+            "--images", str(args.images),
+            "--seed", str(args.seed),
+        ]
+        subprocess.run(command, cwd=workdir, env={**os.environ, **bench_env(workdir)}, check=True)
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000, help="Her uç için toplam istek")
+    parser.add_argument("--warmup", type=int, default=50, help="Ölçülmeyen ısınma isteği sayısı")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--workdir", type=Path, default=None, help="Var olan seed klasörü (yoksa geçici klasör)")
+    parser.add_argument("--tags", type=int, default=10000)
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--clicks", type=int, default=200000)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=None, help="JSON rapor dosyası")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = (args.workdir or Path(tmp)).resolve()
+        workdir.mkdir(parents=True, exist_ok=True)
+        manifest = _prepare(workdir, args)
+        results: Dict[str, Dict] = {}
+        if args.mode in ("uvicorn", "both"):
+            results.update(_uvicorn(workdir, manifest, args))
+        if args.mode in ("inprocess", "both"):
+            activate(workdir)
+            previous = os.getcwd()
+            os.chdir(workdir)
+            try:
+                results.update(asyncio.run(_inprocess(manifest, args)))
+            finally:
+                os.chdir(previous)
+
+    params = {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()}
+    params["seed_counts"] = manifest["counts"]
+    write_report(args.out, "load", params, results)
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/micro.py
+"""
+Okutma yolunun parçaları için mikro benchmark'lar: QR üretimi (önbelleksiz ve
+disk önbelleğinden), tag sayfası şablon render'ı ve click yazıcısının bir
+batch'i (UA çözümleme + INSERT + günlük özet). Küçük bir sentetik veritabanı
+geçici klasörde hazırlanır; sonuçlar load.py ile aynı JSON biçimindedir.
+
+Kullanım:
+    python benchmarks/micro.py --iterations 200 --out micro.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from benchlib import activate, bench_env, print_table, summarize, write_report  # noqa: E402
+from seed import USER_AGENTS  # noqa: E402
+
+
+def _measure(operation: Callable[[int], None], iterations: int, warmup: int = 3, **extra) -> Dict:
+    for index in range(warmup):
+        operation(-1 - index)
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for index in range(iterations):
+        op_started = time.perf_counter()
+        operation(index)
+        latencies.append(time.perf_counter() - op_started)
+    return summarize(latencies, time.perf_counter() - started, **extra)
+
+
+def _qr_benchmarks(iterations: int) -> Dict[str, Dict]:
+    from qr_cache import DEFAULT_BORDER, DEFAULT_BOX_SIZE, qr_cache, render_png
+
+    base = "https://bench.example.com/t/"
+    return {
+        # Her turda farklı URL: gerçek üretim maliyeti
+        "qr_render": _measure(
+            lambda i: render_png(f"{base}r{i:08d}", DEFAULT_BOX_SIZE, DEFAULT_BORDER), iterations
+        ),
+        "qr_cache_hit": _measure(lambda i: qr_cache.get_png(f"{base}hit", DEFAULT_BOX_SIZE, DEFAULT_BORDER), iterations),
+    }
+
+
+def _template_benchmarks(iterations: int, shortid: str) -> Dict[str, Dict]:
+    from sqlmodel import select
+    from starlette.requests import Request
+
+    import main
+    from db import Profile, Tag, get_read_session
+    from images import avatar_sources
+
+    with get_read_session() as session:
+        tag = session.exec(select(Tag).where(Tag.shortid == shortid)).one()
+        profile = session.exec(select(Profile).where(Profile.tag_id == tag.id)).one()
+    context = {
+        "request": Request({"type": "http", "method": "GET", "path": f"/t/{shortid}", "headers": [], "query_string": b""}),
+        "user_id": None,
+        "SUPPORT_EMAIL": main.SUPPORT_EMAIL,
+        "PURCHASE_URL": main.PURCHASE_URL,
+        "public_base_url": main.PUBLIC_BASE_URL,
+        "public_base_url_issue": None,
+        "public_base_url_configured": True,
+        "tag_id": shortid,
+        "profile": {**profile.model_dump(), "avatar": avatar_sources(profile.image_url)},
+        "public_tag_url": f"{main.PUBLIC_BASE_URL}/t/{shortid}",
+        "is_owner": False,
+    }
+    template = main.templates.get_template("tag.html")
+    return {"template_tag_page": _measure(lambda i: template.render(context), iterations)}
+
+
+def _click_benchmarks(iterations: int, batch_size: int, tag_ids: List[int]) -> Dict[str, Dict]:
+    from clicks import ClickWriter
+
+    rng = random.Random(7)
+    writer = ClickWriter(batch_size, 1.0, batch_size)
+
+    def flush(_: int) -> None:
+        now = datetime.utcnow()
+        batch = [
+            (
+                time.monotonic(),
+                {
+                    "tag_id": rng.choice(tag_ids),
+                    "timestamp": now,
+                    "ip": f"10.0.{rng.randrange(256)}.{rng.randrange(256)}",
+                    "ua": rng.choice(USER_AGENTS),
+                },
+            )
+            for _ in range(batch_size)
+        ]
+        # Arka plan thread'inin yazdığı yol; kuyruk ve bekleme süresi hariç
+        writer._flush(batch)
+
+    result = _measure(flush, iterations, batch_size=batch_size)
+    result["rows_per_sec"] = round(result["rps"] * batch_size, 1)
+    if writer.dropped or writer.failed:
+        result["errors"] = writer.dropped + writer.failed
+    return {"click_insert_batch": result}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--click-batch", type=int, default=500, help="Click batch boyutu (CLICK_BATCH_SIZE)")
+    parser.add_argument("--click-iterations", type=int, default=50)
+    parser.add_argument("--out", type=Path, default=None, help="JSON rapor dosyası")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        seed_command = [
+            sys.executable,
+            str(Path(__file__).with_name("seed.py")),
+            "--workdir", str(workdir),
+            "--tags", "200",
+            "--profiles", "50",
+            "--clicks", "0",
+            "--images", "2",
+        ]
+        subprocess.run(seed_command, env={**os.environ, **bench_env(workdir)}, check=True, stdout=subprocess.DEVNULL)
+        activate(workdir)
+        from sqlmodel import select
+
+        from db import Tag, get_read_session
+
+        manifest = json.loads((workdir / "seed.json").read_text(encoding="utf-8"))
+        with get_read_session() as session:
+            tag_ids = list(session.exec(select(Tag.id).where(Tag.shortid.in_(manifest["owned"]))).all())
+
+        results: Dict[str, Dict] = {}
+        results.update(_qr_benchmarks(args.iterations))
+        results.update(_template_benchmarks(args.iterations, manifest["owned"][0]))
+        results.update(_click_benchmarks(args.click_iterations, args.click_batch, tag_ids))
+
+    params = {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()}
+    write_report(args.out, "micro", params, results)
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
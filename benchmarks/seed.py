@@ -0,0 +1,204 @@
+# benchmarks/seed.py
+"""
+Benchmark'lar için sentetik veritabanı. Verilen klasörde (veritabanı,
+yüklemeler ve önbellekler dahil) N tag, bunların P tanesine sahip + profil,
+K farklı profil görseli ve son `--days` güne yayılmış M okutma oluşturur.
+Okutmaların çoğu az sayıda "popüler" tag'e düşer. Yük testinin hedef
+seçebilmesi için örnek shortid'leri `seed.json` dosyasına yazar.
+
+Kullanım:
+    python benchmarks/seed.py --workdir /tmp/bench --tags 10000 --profiles 2000 --clicks 200000
+"""
+import argparse
+import hashlib
+import io
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from benchlib import ADMIN_EMAIL, ADMIN_PASSWORD, activate  # noqa: E402
+
+CLICK_CHUNK = 5000
+SAMPLE_SIZE = 1000
+USER_AGENTS = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; SM-S911B) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/24.0 Chrome/117.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 Instagram 329.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1",
+    "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+)
+
+
+def _sample_image(rng: random.Random) -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (640, 480), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        box = sorted(rng.randrange(640) for _ in range(2)), sorted(rng.randrange(480) for _ in range(2))
+        draw.ellipse((box[0][0], box[1][0], box[0][1], box[1][1]), fill=tuple(rng.randrange(256) for _ in range(3)))
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _store_images(workdir: Path, count: int, rng: random.Random) -> List[str]:
+    from images import AVATAR_DEFAULT_WIDTH, store_avatar
+    from storage import BLOB_KEY_LENGTH, upload_storage
+
+    urls = []
+    for index in range(count):
+        data = _sample_image(rng)
+        key = hashlib.sha256(data).hexdigest()[:BLOB_KEY_LENGTH]
+        source = workdir / f"seed-image-{index}.jpg"
+        source.write_bytes(data)
+        try:
+            store_avatar(source, key, upload_storage)
+        finally:
+            source.unlink(missing_ok=True)
+        urls.append(upload_storage.url(f"{key}-{AVATAR_DEFAULT_WIDTH}.jpg"))
+    return urls
+
+
+def seed(workdir: Path, tags: int, profiles: int, clicks: int, images: int, days: int = 30, seed_value: int = 42) -> Dict:
+    """
+    `activate(workdir)` çağrıldıktan sonra çalıştırılmalıdır.
+    """
+    from sqlalchemy import bindparam, insert, update
+
+    from auth import hash_password
+    from clicks import apply_rollup, apply_sketches
+    from db import Blob, Click, Profile, Tag, User, engine, init_db
+    from inventory import bulk_generate
+    from storage import blob_key
+    from useragents import ua_interner
+
+    rng = random.Random(seed_value)
+    profiles = min(profiles, tags)
+    started = time.perf_counter()
+    init_db()
+
+    shortids = bulk_generate(tags)
+    owned = shortids[:profiles]
+    image_urls = _store_images(workdir, images, rng) if profiles else []
+
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        admin = {"email": ADMIN_EMAIL, "password_hash": hash_password(ADMIN_PASSWORD), "name": "Bench Admin"}
+        conn.execute(insert(User), [{**admin, "created_at": now}])
+        if owned:
+            conn.execute(
+                insert(User),
+                [{"email": f"bench-{i}@example.com", "password_hash": "-", "created_at": now} for i in range(len(owned))],
+            )
+            user_ids = dict(conn.execute(User.__table__.select().with_only_columns(User.email, User.id)).all())
+            conn.execute(
+                update(Tag).where(Tag.shortid == bindparam("b_shortid")).values(owner_user_id=bindparam("b_owner")),
+                [{"b_shortid": sid, "b_owner": user_ids[f"bench-{i}@example.com"]} for i, sid in enumerate(owned)],
+            )
+            tag_ids = dict(
+                conn.execute(
+                    Tag.__table__.select().with_only_columns(Tag.shortid, Tag.id).where(Tag.owner_user_id.is_not(None))
+                ).all()
+            )
+            profile_rows = [
+                {
+                    "tag_id": tag_ids[sid],
+                    "full_name": f"Bench Kullanıcı {i}",
+                    "title": "Satış Müdürü",
+                    "description": "Benchmark için oluşturulmuş örnek profil. " * 3,
+                    "link": "https://example.com",
+                    "image_url": image_urls[i % len(image_urls)] if image_urls else None,
+                    "phone": f"+90555{i:07d}",
+                    "public_email": f"bench-{i}@example.com",
+                    "instagram": f"bench{i}",
+                    "linkedin": f"bench-{i}",
+                    "theme_color": "#2563eb",
+                    "updated_at": now,
+                }
+                for i, sid in enumerate(owned)
+            ]
+            conn.execute(insert(Profile), profile_rows)
+            refcounts: Dict[str, int] = {}
+            for row in profile_rows:
+                key = blob_key(row["image_url"])
+                if key:
+                    refcounts[key] = refcounts.get(key, 0) + 1
+            if refcounts:
+                conn.execute(
+                    insert(Blob),
+                    [{"key": key, "refcount": n, "created_at": now, "updated_at": now} for key, n in refcounts.items()],
+                )
+
+    # Okutmaların %80'i sahipli tag'lerin ilk %10'una düşer
+    written = 0
+    if owned and clicks:
+        hot = [tag_ids[sid] for sid in owned[: max(1, len(owned) // 10)]]
+        cold = [tag_ids[sid] for sid in owned]
+        span = days * 86400
+        while written < clicks:
+            rows = []
+            for _ in range(min(CLICK_CHUNK, clicks - written)):
+                rows.append(
+                    {
+                        "tag_id": rng.choice(hot) if rng.random() < 0.8 else rng.choice(cold),
+                        "timestamp": now - timedelta(seconds=rng.randrange(span)),
+                        "ip": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+                        "ua": rng.choice(USER_AGENTS),
+                    }
+                )
+            with engine.begin() as conn:
+                ua_ids = ua_interner.resolve(conn, {row["ua"] for row in rows})
+                conn.execute(
+                    insert(Click),
+                    [
+                        {"tag_id": row["tag_id"], "timestamp": row["timestamp"], "ip": row["ip"], "ua_id": ua_ids[row["ua"]]}
+                        for row in rows
+                    ],
+                )
+                apply_rollup(conn, rows)
+                apply_sketches(conn, rows)
+            ua_interner.remember(ua_ids)
+            written += len(rows)
+
+    manifest = {
+        "counts": {"tags": len(shortids), "profiles": len(owned), "clicks": written, "images": len(image_urls)},
+        "owned": owned[:SAMPLE_SIZE],
+        "hot": owned[: max(1, len(owned) // 10)][:SAMPLE_SIZE],
+        "unowned": shortids[profiles : profiles + SAMPLE_SIZE],
+        "admin": {"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD},
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    (workdir / "seed.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workdir", type=Path, required=True)
+    parser.add_argument("--tags", type=int, default=10000)
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--clicks", type=int, default=200000)
+    parser.add_argument("--images", type=int, default=20, help="Farklı profil görseli sayısı")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = args.workdir.resolve()
+    if (workdir / "bench.db").exists():
+        parser.error(f"{workdir} içinde zaten bir benchmark veritabanı var")
+    activate(workdir)
+    manifest = seed(workdir, args.tags, args.profiles, args.clicks, args.images, args.days, args.seed)
+    print(json.dumps({"workdir": str(workdir), **manifest["counts"], "seconds": manifest["seconds"]}))
+
+
+if __name__ == "__main__":
+    main()
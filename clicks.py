@@ -0,0 +1,357 @@
+# clicks.py
+"""
+NFC okutmalarını (Click) istek yolunda tek tek commit etmek yerine bellekte
+kuyruğa alıp arka planda toplu (batch) olarak yazan write-behind katmanı.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, time as time_of_day
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import func
+
+from db import Click, ClickDaily, ClickHourly, ClickSketch, UserAgent, engine, upsert_insert
+from hll import HyperLogLog, visitor_hash
+from metrics import click_flush_duration
+from useragents import normalize_ua, ua_interner
+
+logger = logging.getLogger(__name__)
+
+CLICK_BATCH_SIZE = int(os.getenv("CLICK_BATCH_SIZE", "500"))
+CLICK_MAX_DELAY = float(os.getenv("CLICK_MAX_DELAY", "1.0"))  # saniye
+CLICK_QUEUE_SIZE = int(os.getenv("CLICK_QUEUE_SIZE", "50000"))
+# Geçici yazma hatalarında (ör. "database is locked") batch düşürülmeden önceki deneme sayısı
+CLICK_WRITE_RETRIES = int(os.getenv("CLICK_WRITE_RETRIES", "5"))
+CLICK_RETRY_BACKOFF = float(os.getenv("CLICK_RETRY_BACKOFF", "0.2"))  # saniye, her denemede iki katı
+CLICK_RETRY_MAX_BACKOFF = 5.0
+
+# (kuyruğa girdiği monotonic zaman, click satırı)
+_Event = Tuple[float, Dict]
+
+
+class ClickWriter:
+    """
+    Kuyruktaki click olaylarını `batch_size` dolunca ya da ilk olay
+    `max_delay` saniye beklediğinde tek bir çok satırlı INSERT ile yazar.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        max_delay: float,
+        queue_size: int,
+        retries: int = CLICK_WRITE_RETRIES,
+        backoff: float = CLICK_RETRY_BACKOFF,
+    ) -> None:
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max(0.01, max_delay)
+        self.retries = max(0, retries)
+        self.backoff = max(0.0, backoff)
+        self._queue: "queue.Queue[_Event]" = queue.Queue(maxsize=max(1, queue_size))
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        # Sayaçlar
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0  # kuyruk dolu
+        self.retried = 0  # geçici hata sonrası yeniden denenen batch yazımları
+        self.failed = 0  # tüm denemelere rağmen yazılamayan olaylar
+        self.delayed = 0  # max_delay'in iki katından uzun bekleyenler (yazıcı geride)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="click-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Yeni olay beklemeyi bırakır, kuyrukta kalanları yazıp thread'i kapatır.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread:
+            thread.join(timeout)
+        self._thread = None
+
+    def record(self, tag_id: int, ip: Optional[str], ua: Optional[str]) -> bool:
+        """
+        Okutmayı kuyruğa ekler; istek yolunda veritabanına dokunmaz.
+        Kuyruk doluysa olayı düşürür ve False döndürür.
+        """
+        if self._thread is None:
+            self.start()
+        row = {"tag_id": tag_id, "timestamp": datetime.utcnow(), "ip": ip, "ua": normalize_ua(ua)}
+        try:
+            self._queue.put_nowait((time.monotonic(), row))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "batches": self.batches,
+                "dropped": self.dropped,
+                "retried": self.retried,
+                "failed": self.failed,
+                "delayed": self.delayed,
+                "pending": self.pending(),
+            }
+
+    # --- Arka plan döngüsü ---
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._stop.is_set():
+                break
+
+    def _collect(self) -> List[_Event]:
+        batch: List[_Event] = []
+        try:
+            if self._stop.is_set():
+                batch.append(self._queue.get_nowait())
+            else:
+                batch.append(self._queue.get(timeout=self.max_delay))
+        except queue.Empty:
+            return batch
+
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if self._stop.is_set() or remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: List[_Event]) -> None:
+        """
+        Batch'i yazar. Kilit beklemesi gibi geçici hatalarda (OperationalError)
+        artan aralıklarla `retries` kez yeniden dener; yalnızca bunlar da
+        başarısız olursa ya da hata kalıcıysa olaylar `failed` sayacına işlenir.
+        """
+        rows = [row for _, row in batch]
+        attempt = 0
+        while True:
+            try:
+                self._write(rows)
+                break
+            except OperationalError:
+                if attempt >= self.retries:
+                    logger.exception("Click batch %d denemede yazılamadı (%d olay düşürüldü)", attempt + 1, len(rows))
+                    self._fail(rows)
+                    return
+                delay = min(self.backoff * (2 ** attempt), CLICK_RETRY_MAX_BACKOFF)
+                attempt += 1
+                logger.warning("Click batch yazılamadı, %.2f sn sonra yeniden denenecek (%d/%d)", delay, attempt, self.retries)
+                with self._lock:
+                    self.retried += 1
+                time.sleep(delay)
+            except Exception:
+                logger.exception("Click batch yazılamadı (%d olay düşürüldü)", len(rows))
+                self._fail(rows)
+                return
+
+        now = time.monotonic()
+        late = sum(1 for queued_at, _ in batch if now - queued_at > self.max_delay * 2)
+        with self._lock:
+            self.written += len(rows)
+            self.batches += 1
+            self.delayed += late
+
+    def _write(self, rows: List[Dict]) -> None:
+        with click_flush_duration.time(), engine.begin() as conn:
+            ua_ids = ua_interner.resolve(conn, {row["ua"] for row in rows if row["ua"]})
+            conn.execute(
+                insert(Click).values(
+                    [
+                        {
+                            "tag_id": row["tag_id"],
+                            "timestamp": row["timestamp"],
+                            "ip": row["ip"],
+                            "ua_id": ua_ids.get(row["ua"]),
+                        }
+                        for row in rows
+                    ]
+                )
+            )
+            apply_rollup(conn, rows)
+            apply_sketches(conn, rows)
+        ua_interner.remember(ua_ids)
+
+    def _fail(self, rows: List[Dict]) -> None:
+        with self._lock:
+            self.failed += len(rows)
+
+
+# --- Günlük ve saatlik özet (ClickDaily / ClickHourly) ---
+
+def _upsert_counts(conn, model, key: str, counts: Counter) -> None:
+    stmt = upsert_insert(conn, model)
+    stmt = stmt.values(
+        [{"tag_id": tag_id, key: bucket, "count": n} for (tag_id, bucket), n in counts.items()]
+    ).on_conflict_do_update(
+        index_elements=["tag_id", key],
+        set_={"count": model.__table__.c["count"] + stmt.excluded["count"]},
+    )
+    conn.execute(stmt)
+
+
+def apply_rollup(conn, rows: Iterable[Dict]) -> None:
+    """
+    Yazılan click satırlarını (tag_id, gün) ve (tag_id, saat) bazında sayıp
+    ClickDaily ve ClickHourly'ye ekler. Click INSERT'i ile aynı transaction
+    içinde çağrılmalıdır.
+    """
+    daily: Counter = Counter()
+    hourly: Counter = Counter()
+    for row in rows:
+        timestamp = row["timestamp"]
+        daily[(row["tag_id"], timestamp.date())] += 1
+        hourly[(row["tag_id"], timestamp.replace(minute=0, second=0, microsecond=0))] += 1
+    if not daily:
+        return
+    _upsert_counts(conn, ClickDaily, "day", daily)
+    _upsert_counts(conn, ClickHourly, "hour", hourly)
+
+
+def _hour_of(conn, column):
+    if conn.dialect.name == "sqlite":
+        # SQLAlchemy'nin SQLite DateTime metin biçimiyle aynı (birincil anahtar eşleşsin)
+        return func.strftime("%Y-%m-%d %H:00:00.000000", column)
+    return func.date_trunc("hour", column)
+
+
+def backfill_rollup(since: Optional[date] = None) -> int:
+    """
+    ClickDaily ve ClickHourly tablolarını ham Click tablosundan yeniden
+    oluşturur. Yalnızca `since` ile en eski ham okutmanın gününden geç olanı
+    ve sonrası yenilenir; saklama politikasıyla ham kaydı silinmiş günlerin
+    özeti, daha eski bir `since` verilse de korunur. Tek transaction'da
+    çalıştığı için yazıcının batch'leriyle çakışmaz. Yeniden oluşan günlük
+    özet satırı sayısını döndürür (ham okutma yoksa 0).
+    """
+    day = func.date(Click.timestamp)
+    with engine.begin() as conn:
+        oldest = conn.execute(select(func.min(Click.timestamp))).scalar()
+        if oldest is None:
+            return 0
+        oldest_day = (oldest if isinstance(oldest, datetime) else datetime.fromisoformat(str(oldest))).date()
+        since = max(since, oldest_day) if since else oldest_day
+        start = datetime.combine(since, time_of_day.min)
+        conn.execute(delete(ClickDaily).where(ClickDaily.day >= since))
+        conn.execute(
+            insert(ClickDaily).from_select(
+                ["tag_id", "day", "count"],
+                select(Click.tag_id, day, func.count(Click.id))
+                .where(Click.timestamp >= start)
+                .group_by(Click.tag_id, day),
+            )
+        )
+        hour = _hour_of(conn, Click.timestamp)
+        conn.execute(delete(ClickHourly).where(ClickHourly.hour >= start))
+        conn.execute(
+            insert(ClickHourly).from_select(
+                ["tag_id", "hour", "count"],
+                select(Click.tag_id, hour, func.count(Click.id))
+                .where(Click.timestamp >= start)
+                .group_by(Click.tag_id, hour),
+            )
+        )
+        return int(
+            conn.execute(select(func.count()).select_from(ClickDaily).where(ClickDaily.day >= since)).scalar() or 0
+        )
+
+
+# --- Tekil ziyaretçi taslakları (ClickSketch) ---
+
+def apply_sketches(conn, rows: Iterable[Dict]) -> None:
+    """
+    Okutmaların ziyaretçi özetlerini (IP + UA) (tag_id, gün) taslaklarına
+    ekler: mevcut taslaklar tek sorguyla okunur, birleştirilir ve tek upsert
+    ile yazılır. Click INSERT'i ile aynı transaction içinde çağrılmalıdır.
+    """
+    hashes: Dict[Tuple[int, date], List[int]] = defaultdict(list)
+    for row in rows:
+        hashes[(row["tag_id"], row["timestamp"].date())].append(visitor_hash(row["ip"], row["ua"]))
+    if not hashes:
+        return
+    existing = {
+        (tag_id, day): data
+        for tag_id, day, data in conn.execute(
+            select(ClickSketch.tag_id, ClickSketch.day, ClickSketch.registers).where(
+                ClickSketch.tag_id.in_({tag_id for tag_id, _ in hashes}),
+                ClickSketch.day.in_({day for _, day in hashes}),
+            )
+        )
+    }
+    values = []
+    for (tag_id, day), items in hashes.items():
+        data = existing.get((tag_id, day))
+        sketch = HyperLogLog.from_bytes(data) if data else HyperLogLog()
+        values.append({"tag_id": tag_id, "day": day, "registers": sketch.update(items).to_bytes()})
+    stmt = upsert_insert(conn, ClickSketch)
+    stmt = stmt.values(values).on_conflict_do_update(
+        index_elements=["tag_id", "day"], set_={"registers": stmt.excluded["registers"]}
+    )
+    conn.execute(stmt)
+
+
+def backfill_sketches(since: Optional[date] = None, batch_size: int = 5000) -> int:
+    """
+    Ham okutmaları (varsayılan: tümü) taslaklara ekler. Taslak birleştirme
+    idempotent olduğu için mevcut taslaklar silinmez; aynı okutma ikinci kez
+    eklense de sayım değişmez. Her batch kendi transaction'ındadır.
+    İşlenen okutma sayısını döndürür.
+    """
+    start = datetime.combine(since, time_of_day.min) if since else None
+    processed = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            query = (
+                select(Click.id, Click.tag_id, Click.timestamp, Click.ip, UserAgent.ua)
+                .outerjoin(UserAgent, UserAgent.id == Click.ua_id)
+                .where(Click.id > last_id)
+                .order_by(Click.id)
+                .limit(max(1, batch_size))
+            )
+            if start is not None:
+                query = query.where(Click.timestamp >= start)
+            rows = [dict(row._mapping) for row in conn.execute(query)]
+            if not rows:
+                break
+            apply_sketches(conn, rows)
+        last_id = rows[-1]["id"]
+        processed += len(rows)
+    return processed
+
+
+click_writer = ClickWriter(CLICK_BATCH_SIZE, CLICK_MAX_DELAY, CLICK_QUEUE_SIZE)
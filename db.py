@@ -1,31 +1,132 @@
 # db.py
-from datetime import datetime
-from typing import Optional
+import os
+import time
+from datetime import date, datetime
+from typing import Dict, Optional
+from sqlalchemy import Index, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session as OrmSession
 from sqlmodel import SQLModel, Field, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-DATABASE_URL = "sqlite:///./app.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+from metrics import db_commit_duration, db_sessions
+from profiler import SQL_PROFILE, instrument_engine
+
+# ---------------------
+# Bağlantı ayarları
+# ---------------------
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+# Postgres replika gibi ayrı bir okuma adresi (boşsa DATABASE_URL)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "2"))
+DB_POOL_OVERFLOW = int(os.getenv("DB_POOL_OVERFLOW", "10"))
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _async_url(url: URL) -> URL:
+    backend = url.get_backend_name()
+    return url.set(drivername=_ASYNC_DRIVERS.get(backend, url.drivername))
+
+
+def _is_sqlite_file(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _readonly_url(url: URL) -> URL:
+    """
+    SQLite dosyası için salt-okunur URI bağlantısı; diğer veritabanlarında
+    DATABASE_READ_URL (varsa) kullanılır.
+    """
+    if DATABASE_READ_URL:
+        return make_url(DATABASE_READ_URL)
+    if not _is_sqlite_file(url) or url.database.startswith("file:"):
+        return url
+    path = os.path.abspath(url.database)
+    return url.set(database=f"file:{path}", query={**url.query, "mode": "ro", "uri": "true"})
+
+
+def _engine_options(url: URL, pool_size: int) -> dict:
+    options: dict = {}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if not _is_sqlite_file(url):
+            return options  # :memory: -> StaticPool
+    options.update(pool_size=pool_size, max_overflow=DB_POOL_OVERFLOW)
+    return options
+
+
+def _apply_sqlite_pragmas(sync_engine, writer: bool) -> None:
+    """
+    Her yeni SQLite bağlantısında üretim ayarlarını uygular. WAL modunda
+    okuyucular yazıcıyı beklemez; synchronous=NORMAL WAL ile güvenlidir.
+    """
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if writer:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.close()
+
+
+_write_url = make_url(DATABASE_URL)
+_read_url = _readonly_url(_write_url)
+IS_SQLITE = _write_url.get_backend_name() == "sqlite"
+
+# Yazma motoru: formlar, click yazıcısı, betikler (insert_tag.py / manage.py)
+engine = create_engine(_write_url, **_engine_options(_write_url, DB_WRITE_POOL_SIZE))
+# Okuma motoru: yazmalar arkasında kuyruğa girmemesi gereken sorgular
+read_engine = create_engine(_read_url, **_engine_options(_read_url, DB_READ_POOL_SIZE))
+
+# Async handler'lar için aynı veritabanlarına async sürücüyle (aiosqlite / asyncpg) bağlanan motorlar
+async_engine = create_async_engine(_async_url(_write_url), **_engine_options(_write_url, DB_WRITE_POOL_SIZE))
+async_read_engine = create_async_engine(_async_url(_read_url), **_engine_options(_read_url, DB_READ_POOL_SIZE))
+
+_apply_sqlite_pragmas(engine, writer=True)
+_apply_sqlite_pragmas(async_engine.sync_engine, writer=True)
+_apply_sqlite_pragmas(read_engine, writer=False)
+_apply_sqlite_pragmas(async_read_engine.sync_engine, writer=False)
+
+if SQL_PROFILE:
+    # İstek başına sorgu sayısı/süresi (profiler.SQLProfilerMiddleware ile birlikte)
+    for _sync_engine in (engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine):
+        instrument_engine(_sync_engine)
 
 # ---------------------
 # Modeller
 # ---------------------
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    email: str = Field(index=True)  # üretimde UNIQUE index önerilir
+    email: str = Field(unique=True, index=True)
     password_hash: str
     name: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class Tag(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    shortid: str = Field(index=True)  # üretimde UNIQUE index önerilir
-    owner_user_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    shortid: str = Field(unique=True, index=True)
+    owner_user_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
     status: str = Field(default="active")
+    batch_label: Optional[str] = None  # tedarikçi/üretim partisi
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class Profile(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    tag_id: int = Field(foreign_key="tag.id")
+    tag_id: int = Field(foreign_key="tag.id", index=True)
 
     # Kartvizit / profil alanları
     full_name: Optional[str] = None
@@ -45,42 +146,116 @@ class Profile(SQLModel, table=True):
     theme_color: Optional[str] = Field(default="#2563eb")
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class UserAgent(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    hash: str = Field(unique=True, index=True)  # UA metninin özeti
+    ua: str
+    device: str = Field(default="other")  # mobile / tablet / desktop / bot / other
+    os: str = Field(default="other")
+    browser: str = Field(default="other")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
 class Click(SQLModel, table=True):
+    # Zaman aralığı sorguları tag + zaman üzerinden gider
+    __table_args__ = (Index("ix_click_tag_id_timestamp", "tag_id", "timestamp"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     tag_id: int = Field(foreign_key="tag.id")
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     ip: Optional[str] = None
-    ua: Optional[str] = None
+    # Ham UA metni yerine UserAgent boyut tablosundaki id
+    ua_id: Optional[int] = Field(default=None, foreign_key="useragent.id")
+
+class ClickDaily(SQLModel, table=True):
+    # Günlük okutma özeti; click yazılırken artımlı güncellenir
+    tag_id: int = Field(foreign_key="tag.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    count: int = Field(default=0)
+
+class ClickHourly(SQLModel, table=True):
+    # Saatlik okutma özeti (saat başı, UTC); saatlik istatistik serileri buradan okunur
+    tag_id: int = Field(foreign_key="tag.id", primary_key=True)
+    hour: datetime = Field(primary_key=True)
+    count: int = Field(default=0)
+
+class ClickSketch(SQLModel, table=True):
+    # Günlük tekil ziyaretçi taslağı (hll.HyperLogLog.to_bytes); ClickDaily ile birlikte güncellenir
+    tag_id: int = Field(foreign_key="tag.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    registers: bytes
+
+class Blob(SQLModel, table=True):
+    # İçerik adresli yükleme; key içerik özetidir, aynı dosya bir kez saklanır
+    key: str = Field(primary_key=True)
+    refcount: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 # ---------------------
-# Basit migrasyon: eksik kolonları ekle
+# Yardımcılar
 # ---------------------
-def ensure_profile_columns():
-    needed = {
-        "full_name": "TEXT",
-        "phone": "TEXT",
-        "public_email": "TEXT",
-        "instagram": "TEXT",
-        "linkedin": "TEXT",
-        "facebook": "TEXT",
-        "whatsapp": "TEXT",
-        "iban": "TEXT",
-        "theme_color": "TEXT",
-        "updated_at": "DATETIME",
-    }
-    with engine.connect() as conn:
-        cols = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info('profile')").fetchall()}
-        for col, typ in needed.items():
-            if col not in cols:
-                conn.exec_driver_sql(f"ALTER TABLE profile ADD COLUMN {col} {typ};")
+def upsert_insert(bind, model):
+    """
+    ON CONFLICT destekli INSERT ifadesi (SQLite ya da PostgreSQL lehçesi).
+    """
+    dialect = postgresql if bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(model.__table__)
 
 # ---------------------
 # DB init & session
 # ---------------------
 def init_db():
-    SQLModel.metadata.create_all(engine)
-    ensure_profile_columns()
+    # Tablolar ve index'ler migrations.py'de; şema güncelse yalnızca sürüm okunur
+    from migrations import migrate
+
+    migrate()
 
 def get_session() -> Session:
     # expire_on_commit=False -> render sırasında DetachedInstanceError riskini azaltır
-    return Session(engine, expire_on_commit=False)
+    db_sessions.inc("write")
+    return Session(engine, expire_on_commit=False, info={"pool": "write"})
+
+def get_read_session() -> Session:
+    db_sessions.inc("read")
+    return Session(read_engine, expire_on_commit=False, info={"pool": "read"})
+
+def get_async_session() -> AsyncSession:
+    db_sessions.inc("async_write")
+    return AsyncSession(async_engine, expire_on_commit=False, info={"pool": "async_write"})
+
+def get_async_read_session() -> AsyncSession:
+    # Public sayfalar bu havuzdan okur; yazma havuzunu beklemez
+    db_sessions.inc("async_read")
+    return AsyncSession(async_read_engine, expire_on_commit=False, info={"pool": "async_read"})
+
+# Commit süresi: AsyncSession da olayları içindeki senkron Session üzerinden tetikler
+@event.listens_for(OrmSession, "before_commit")
+def _on_before_commit(session) -> None:
+    session.info["commit_started"] = time.perf_counter()
+
+@event.listens_for(OrmSession, "after_commit")
+def _on_after_commit(session) -> None:
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        db_commit_duration.observe(time.perf_counter() - started, session.info.get("pool", "other"))
+
+def pool_stats() -> Dict[str, int]:
+    """
+    Havuz başına kullanımdaki bağlantı sayısı (/metrics için).
+    """
+    pools = {
+        "write": engine.pool,
+        "read": read_engine.pool,
+        "async_write": async_engine.sync_engine.pool,
+        "async_read": async_read_engine.sync_engine.pool,
+    }
+    stats: Dict[str, int] = {}
+    for name, pool in pools.items():
+        checkedout = getattr(pool, "checkedout", None)  # StaticPool'da yok
+        if checkedout is not None:
+            stats[f"{name}_checked_out"] = checkedout()
+    return stats
+
+async def dispose_async_engine() -> None:
+    await async_engine.dispose()
+    await async_read_engine.dispose()
@@ -0,0 +1,103 @@
+# export.py
+"""
+Ham okutma (Click) dışa aktarımı. Satırlar okuma motorundan sabit boyutlu
+parçalar halinde, anahtar sırasıyla (keyset) okunur: her parça kendi kısa
+bağlantısında çalışır, bellekte en fazla bir parça tutulur ve uzun süre açık
+kalan bir okuma transaction'ı olmaz. WAL modunda okuyucular yazıcıyı
+beklemediği için dışa aktarım sürerken okutmalar yazılmaya devam eder.
+
+Tek tag'in aktarımı (tag_id, timestamp) index'i üzerinden zaman sırasıyla,
+tüm tablonun aktarımı birincil anahtar sırasıyla yapılır.
+"""
+import json
+import os
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+
+from db import Click, Tag, UserAgent, read_engine
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_COLUMNS = ["id", "shortid", "timestamp", "ip", "user_agent", "device", "os", "browser"]
+
+
+def date_range(start: Optional[date], end: Optional[date]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Gün sınırları (UTC); `end` günü dahildir.
+    """
+    lower = datetime.combine(start, dt_time.min) if start else None
+    upper = datetime.combine(end + timedelta(days=1), dt_time.min) if end else None
+    return lower, upper
+
+
+def iter_clicks(
+    tag_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[Tuple]:
+    """
+    EXPORT_COLUMNS sırasıyla satırlar üretir. `tag_id` verilmezse tüm tag'ler.
+    """
+    columns = (
+        Click.id,
+        Tag.shortid,
+        Click.timestamp,
+        Click.ip,
+        UserAgent.ua,
+        UserAgent.device,
+        UserAgent.os,
+        UserAgent.browser,
+    )
+    base = (
+        select(*columns)
+        .select_from(Click)
+        .join(Tag, Tag.id == Click.tag_id)
+        .outerjoin(UserAgent, UserAgent.id == Click.ua_id)
+    )
+    if tag_id is not None:
+        base = base.where(Click.tag_id == tag_id).order_by(Click.timestamp, Click.id)
+    else:
+        base = base.order_by(Click.id)
+    if start is not None:
+        base = base.where(Click.timestamp >= start)
+    if end is not None:
+        base = base.where(Click.timestamp < end)
+
+    last: Optional[Tuple] = None
+    while True:
+        query = base
+        if last is not None:
+            if tag_id is not None:
+                query = query.where(tuple_(Click.timestamp, Click.id) > tuple_(last[2], last[0]))
+            else:
+                query = query.where(Click.id > last[0])
+        with read_engine.connect() as conn:
+            rows = conn.execute(query.limit(max(1, chunk_size))).all()
+        if not rows:
+            return
+        for row in rows:
+            yield tuple(row)
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+
+
+def csv_row(row: Tuple) -> Tuple:
+    return tuple(value.isoformat() if isinstance(value, datetime) else value for value in row)
+
+
+def iter_ndjson(rows: Iterator[Tuple], chunk_rows: int = 1000) -> Iterator[bytes]:
+    """
+    Satır başına bir JSON nesnesi; parçalar halinde UTF-8 (StreamingResponse için).
+    """
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_COLUMNS, csv_row(row))), ensure_ascii=False))
+        if len(lines) >= chunk_rows:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
@@ -0,0 +1,140 @@
+# hll.py
+"""
+Tekil ziyaretçi tahmini için HyperLogLog. Her (tag, gün) için 2^12 adet
+küçük sayaçtan oluşan bir taslak tutulur; taslaklar birleştirilebilir
+(register bazında max), böylece herhangi bir gün aralığının tekil ziyaretçi
+sayısı o günlerin taslakları birleştirilerek ~%1.6 standart hatayla bulunur.
+
+Az okutulan günlerde yalnızca dolu register'lar saklanır (seyrek biçim);
+taslak yoğun biçime ancak kendi boyutunu aşacak kadar dolduğunda geçer.
+"""
+import hashlib
+import math
+import struct
+from typing import Iterable, Optional
+
+# Hassasiyet değiştirilirse eski taslaklar birleştirilemez; bu yüzden sabit
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+
+_SPARSE = 1
+_DENSE = 2
+_HASH_BITS = 64
+_RANK_BITS = _HASH_BITS - HLL_PRECISION
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(_RANK_BITS + 2)]
+_SPARSE_ENTRY = struct.Struct(">HB")
+_HIGH_BITS = int.from_bytes(b"\x80" * HLL_REGISTERS, "big")
+_ALL_BITS = (1 << (8 * HLL_REGISTERS)) - 1
+
+
+def _alpha(m: int) -> float:
+    if m == 16:
+        return 0.673
+    if m == 32:
+        return 0.697
+    if m == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / m)
+
+
+def _max_registers(left: bytes, right: bytes) -> bytearray:
+    """
+    Bayt bazında max. Register değerleri 128'den küçük olduğundan tüm dizi tek
+    bir büyük tamsayı üzerinde (SWAR) karşılaştırılır; bayt döngüsünden ~100
+    kat hızlıdır.
+    """
+    a = int.from_bytes(left, "big")
+    b = int.from_bytes(right, "big")
+    # Her baytın yüksek biti: a_i >= b_i (a_i + 128 - b_i taşmaz, komşu bayta borç geçmez)
+    mask = ((((a | _HIGH_BITS) - b) & _HIGH_BITS) >> 7) * 0xFF
+    return bytearray(((a & mask) | (b & ~mask & _ALL_BITS)).to_bytes(HLL_REGISTERS, "big"))
+
+
+def visitor_hash(ip: Optional[str], ua: Optional[str]) -> int:
+    """
+    Ziyaretçiyi IP + User-Agent ile tanımlayan 64 bit özet. Taslakta yalnızca
+    özetin türetilmiş bitleri kalır; IP geri elde edilemez.
+    """
+    key = f"{ip or ''}\x00{ua or ''}".encode("utf-8", "replace")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    def __init__(self, registers: Optional[bytearray] = None) -> None:
+        self.registers = registers if registers is not None else bytearray(HLL_REGISTERS)
+
+    def add_hash(self, value: int) -> None:
+        index = value >> _RANK_BITS
+        rest = value & ((1 << _RANK_BITS) - 1)
+        rank = _RANK_BITS - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, hashes: Iterable[int]) -> "HyperLogLog":
+        for value in hashes:
+            self.add_hash(value)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        self.registers = _max_registers(self.registers, other.registers)
+        return self
+
+    def merge_bytes(self, data: bytes) -> "HyperLogLog":
+        """
+        Saklanmış bir taslağı açmadan birleştirir (seyrek biçimde yalnızca
+        dolu register'lar gezilir).
+        """
+        kind = _check_header(data)
+        if kind == _DENSE:
+            self.registers = _max_registers(self.registers, data[2:])
+            return self
+        registers = self.registers
+        for index, rank in _SPARSE_ENTRY.iter_unpack(data[2:]):
+            if rank > registers[index]:
+                registers[index] = rank
+        return self
+
+    def count(self) -> int:
+        m = HLL_REGISTERS
+        estimate = _alpha(m) * m * m / sum(map(_INVERSE_POWERS.__getitem__, self.registers))
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Küçük kümelerde doğrusal sayım daha isabetlidir
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    # --- Saklama biçimi ---
+
+    def to_bytes(self) -> bytes:
+        """
+        [biçim, hassasiyet] + seyrek (2 bayt index, 1 bayt değer) ya da yoğun
+        register dizisi; hangisi küçükse.
+        """
+        filled = HLL_REGISTERS - self.registers.count(0)
+        if filled * _SPARSE_ENTRY.size < HLL_REGISTERS:
+            payload = b"".join(
+                _SPARSE_ENTRY.pack(index, rank) for index, rank in enumerate(self.registers) if rank
+            )
+            return bytes([_SPARSE, HLL_PRECISION]) + payload
+        return bytes([_DENSE, HLL_PRECISION]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        if _check_header(data) == _DENSE:
+            return cls(bytearray(data[2:]))
+        return cls().merge_bytes(data)
+
+
+def _check_header(data: bytes) -> int:
+    if len(data) < 2 or data[1] != HLL_PRECISION or data[0] not in (_SPARSE, _DENSE):
+        raise ValueError("Desteklenmeyen HyperLogLog taslağı")
+    if data[0] == _DENSE and len(data) != HLL_REGISTERS + 2:
+        raise ValueError("Bozuk HyperLogLog taslağı")
+    return data[0]
+
+
+def merge_sketches(sketches: Iterable[bytes]) -> HyperLogLog:
+    merged = HyperLogLog()
+    for data in sketches:
+        merged.merge_bytes(data)
+    return merged
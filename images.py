@@ -0,0 +1,212 @@
+# images.py
+"""
+Profil görseli yükleme hattı. İstek gövdesinin boyutu multipart ayrıştırıcı
+onu diske yazmadan önce sınırlanır (UploadLimitMiddleware, aşılırsa 413).
+Ayrıştırıcının geçici dosyası doğrudan okunur; Pillow işlemleri event loop
+dışında çalışır ve avatar için birkaç genişlikte WebP + JPEG varyantı
+üretilir. Varyantlar içerik özetiyle adlandırılıp blob deposuna (storage.py)
+yazılır.
+"""
+import hashlib
+import io
+import os
+import re
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from PIL import Image, ImageOps, UnidentifiedImageError
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from storage import BLOB_KEY_LENGTH, BlobStorage
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(8 * 1024 * 1024)))
+# Çok büyük piksel sayılı (decompression bomb) görselleri reddet
+UPLOAD_MAX_PIXELS = int(os.getenv("UPLOAD_MAX_PIXELS", str(40_000_000)))
+AVATAR_WIDTHS = (128, 256, 512)
+# image_url alanında tutulan ve srcset desteklemeyen yerlerde kullanılan varyant
+AVATAR_DEFAULT_WIDTH = 256
+AVATAR_FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Gövde sınırı: görsel + form alanları ve multipart sınırları için pay
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+UPLOAD_PATH_PREFIXES = ("/edit/",)
+
+_AVATAR_URL_RE = re.compile(r"^(.*/)([0-9a-f]{%d})-\d+\.jpg$" % BLOB_KEY_LENGTH)
+
+
+def _format_size(n: int) -> str:
+    """
+    Kullanıcı mesajları için okunur boyut: 8 MB, 1,5 MB, 512 KB, 300 bayt.
+    """
+    for unit, factor in (("MB", 1024 * 1024), ("KB", 1024)):
+        if n >= factor:
+            text = f"{n / factor:.1f}"
+            if text.endswith(".0"):
+                text = text[:-2]
+            return f"{text.replace('.', ',')} {unit}"
+    return f"{n} bayt"
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Görsel en fazla {_format_size(max_bytes)} olabilir")
+
+
+class UploadLimitMiddleware:
+    """
+    Görsel yüklenen formlarda (POST /edit/...) gövdeyi multipart ayrıştırıcıdan
+    önce sınırlar. Content-Length sınırı aşıyorsa gövde hiç okunmadan 413
+    döner; başlık yoksa (chunked) okunan baytlar sayılır ve sınır aşıldığı
+    anda istek kesilir. Sınıra form alanları için küçük bir pay eklenir.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_bytes: int = UPLOAD_MAX_BYTES,
+        overhead: int = UPLOAD_FORM_OVERHEAD,
+        prefixes: Tuple[str, ...] = UPLOAD_PATH_PREFIXES,
+    ) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.limit = max_bytes + overhead
+        self.prefixes = prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        length = Headers(scope=scope).get("content-length")
+        if length is not None and (not length.isdigit() or int(length) > self.limit):
+            error = _too_large(self.max_bytes)
+            await JSONResponse({"detail": error.detail}, status_code=error.status_code)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    raise _too_large(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def digest_upload(upload: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> str:
+    """
+    Ayrıştırıcının yazdığı dosyayı parça parça okuyup sha256 özetini
+    döndürür ve dosyayı başa sarar; içerik ikinci bir geçici dosyaya
+    kopyalanmaz. Boyut sınırı burada da (ör. middleware dışı çağrılar için)
+    denetlenir.
+    """
+    digest = hashlib.sha256()
+    total = 0
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise _too_large(max_bytes)
+        digest.update(chunk)
+    if not total:
+        raise HTTPException(status_code=400, detail="Görsel dosyası boş")
+    await upload.seek(0)
+    return digest.hexdigest()
+
+
+def _square(image: Image.Image) -> Image.Image:
+    """
+    Avatar daire içinde gösterildiği için ortadan kare kırpar.
+    """
+    side = min(image.size)
+    left = (image.width - side) // 2
+    top = (image.height - side) // 2
+    return image.crop((left, top, left + side, top + side))
+
+
+def variant_names(key: str) -> List[str]:
+    return [f"{key}-{width}.{ext}" for width in AVATAR_WIDTHS for ext, _, _ in AVATAR_FORMATS]
+
+
+def build_variants(source: Union[Path, BinaryIO], key: str) -> List[Tuple[str, bytes, str]]:
+    """
+    Kaynak görselden tüm avatar varyantlarını (ad, içerik, content-type) olarak
+    üretir. Bloklayıcıdır; thread havuzunda çağrılmalıdır.
+    """
+    variants: List[Tuple[str, bytes, str]] = []
+    try:
+        with Image.open(source) as opened:
+            width, height = opened.size
+            if width * height > UPLOAD_MAX_PIXELS:
+                raise HTTPException(status_code=413, detail="Görsel çözünürlüğü çok yüksek")
+            # Telefon fotoğraflarındaki EXIF yönünü uygula; EXIF (konum vb.) kopyalanmaz
+            image = ImageOps.exif_transpose(opened)
+            image = _square(image)
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                rgba = image.convert("RGBA")
+                flat = Image.new("RGB", rgba.size, (255, 255, 255))
+                flat.paste(rgba, mask=rgba.getchannel("A"))
+                image = flat
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+            for width in AVATAR_WIDTHS:
+                resized = image.resize((width, width), Image.LANCZOS)
+                for ext, fmt, options in AVATAR_FORMATS:
+                    buf = io.BytesIO()
+                    resized.save(buf, format=fmt, **options)
+                    variants.append((f"{key}-{width}.{ext}", buf.getvalue(), f"image/{fmt.lower()}"))
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+        raise HTTPException(status_code=400, detail="Görsel dosyası okunamadı")
+    return variants
+
+
+def store_avatar(source: Union[Path, BinaryIO], key: str, storage: BlobStorage) -> None:
+    """
+    Varyantları depoya yazar. Aynı içerik daha önce yüklendiyse (ör. aynı
+    şirket logosu) görsel yeniden işlenmez.
+    """
+    names = variant_names(key)
+    if all(storage.exists(name) for name in names):
+        # Yeniden kullanılan blob'un bekleme süresi baştan başlar (gc_blobs)
+        for name in names:
+            storage.touch(name)
+        return
+    for name, data, content_type in build_variants(source, key):
+        storage.put(name, data, content_type)
+
+
+async def save_avatar(upload: UploadFile, storage: BlobStorage) -> str:
+    """
+    Yüklemeyi işler ve profilde saklanacak varsayılan JPEG varyantının
+    URL'ini döndürür.
+    """
+    key = (await digest_upload(upload))[:BLOB_KEY_LENGTH]
+    await run_in_threadpool(store_avatar, upload.file, key, storage)
+    return storage.url(f"{key}-{AVATAR_DEFAULT_WIDTH}.jpg")
+
+
+def avatar_sources(image_url: Optional[str]) -> Optional[Dict[str, str]]:
+    """
+    Varyantlı bir avatar URL'i için <picture> srcset değerlerini döndürür;
+    eski (tek dosyalı) yüklemeler için None.
+    """
+    match = _AVATAR_URL_RE.match(image_url or "")
+    if not match:
+        return None
+    base, key = match.group(1), match.group(2)
+    return {
+        ext: ", ".join(f"{base}{key}-{width}.{ext} {width}w" for width in AVATAR_WIDTHS)
+        for ext, _, _ in AVATAR_FORMATS
+    }
+
@@ -0,0 +1,155 @@
+# inventory.py
+"""
+Tag envanteri için toplu işlemler: seri shortid üretimi ve CSV import.
+shortid UNIQUE olduğu için çakışma kontrolü ayrı bir SELECT yerine parça
+başına tek INSERT ... ON CONFLICT DO NOTHING RETURNING ile yapılır.
+"""
+import csv
+import os
+import re
+import secrets
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, TextIO
+
+from db import Tag, engine, upsert_insert
+
+TAG_GENERATE_MAX = int(os.getenv("TAG_GENERATE_MAX", "200000"))
+GENERATE_BATCH_SIZE = 5000
+
+
+def generate_shortid(length: int = 8) -> str:
+    token = secrets.token_urlsafe(length)
+    return token.replace("-", "").replace("_", "")[:length]
+
+
+def _insert_new_tags(conn):
+    """
+    Var olan shortid'leri atlayan ve yalnızca eklenenleri döndüren INSERT.
+    """
+    return upsert_insert(conn, Tag).on_conflict_do_nothing(index_elements=["shortid"]).returning(Tag.shortid)
+
+
+def bulk_generate(n: int, length: int = 8, batch_size: int = GENERATE_BATCH_SIZE) -> List[str]:
+    """
+    `n` adet benzersiz shortid üretip tag olarak ekler ve sırayla döndürür.
+    Her `batch_size` parçası kendi kısa transaction'ında commit edilir; SQLite
+    yazma kilidi üretim boyunca tutulmadığı için click yazıcısı parçalar
+    arasında ilerleyebilir. Hata olursa önceki parçalarda eklenen tag'ler
+    kalır (atanmamış envanterdir, yeniden üretim gerekmez).
+    """
+    created: List[str] = []
+    seen: Set[str] = set()
+    now = datetime.utcnow()
+    while len(created) < n:
+        want = min(batch_size, n - len(created))
+        candidates: Set[str] = set()
+        while len(candidates) < want:
+            candidate = generate_shortid(length)
+            if len(candidate) == length and candidate not in seen:
+                candidates.add(candidate)
+        with engine.begin() as conn:
+            fresh = list(conn.execute(
+                _insert_new_tags(conn),
+                [{"shortid": sid, "status": "active", "created_at": now} for sid in candidates],
+            ).scalars())
+        seen.update(candidates)
+        created.extend(fresh)
+    return created
+
+
+# --- CSV import ---
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+_HEADER_ALIASES = {
+    "shortid": "shortid",
+    "id": "shortid",
+    "status": "status",
+    "batch": "batch_label",
+    "batch_label": "batch_label",
+}
+# /t/<shortid> yolunda kaçışsız kullanılabilecek karakterler
+_SHORTID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+FILE_COLUMNS = ("shortid", "status", "batch_label")
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    created_ids: List[str] = field(default_factory=list)
+
+
+def _row_reader(stream: TextIO, columns: Sequence[str]) -> Iterable[Dict[str, str]]:
+    """
+    CSV satırlarını sözlük olarak akış halinde okur. İlk satır yalnızca bilinen
+    kolon adlarından oluşuyorsa başlık kabul edilir; yoksa veri satırıdır ve
+    kolonlar `columns` sırasıyla eşlenir.
+    """
+    reader = csv.reader(stream)
+    for index, row in enumerate(reader):
+        cells = [cell.strip() for cell in row]
+        if not any(cells):
+            continue
+        if index == 0 and all(cell.lower() in _HEADER_ALIASES for cell in cells if cell):
+            columns = [_HEADER_ALIASES.get(cell.lower(), "") for cell in cells]
+            continue
+        yield {name: value for name, value in zip(columns, cells) if name}
+
+
+def _import_chunk(rows: List[Dict[str, str]], default_status: str, default_batch: Optional[str], result: ImportResult) -> None:
+    unique: Dict[str, Dict[str, str]] = {}
+    for row in rows:
+        sid = row["shortid"]
+        if sid in unique:
+            result.skipped += 1
+        else:
+            unique[sid] = row
+    now = datetime.utcnow()
+    # Her parça kendi kısa transaction'ında: uzun yazma kilidi tutulmaz
+    with engine.begin() as conn:
+        inserted = set(conn.execute(
+            _insert_new_tags(conn),
+            [
+                {
+                    "shortid": sid,
+                    "status": row.get("status") or default_status,
+                    "batch_label": row.get("batch_label") or default_batch,
+                    "created_at": now,
+                }
+                for sid, row in unique.items()
+            ],
+        ).scalars())
+    # Dosya sırası korunur
+    fresh = [sid for sid in unique if sid in inserted]
+    result.skipped += len(unique) - len(fresh)
+    result.created += len(fresh)
+    result.created_ids.extend(fresh)
+
+
+def import_csv(
+    stream: TextIO,
+    default_status: str = "active",
+    default_batch: Optional[str] = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    columns: Sequence[str] = FILE_COLUMNS,
+) -> ImportResult:
+    """
+    CSV akışını `chunk_size` satırlık parçalar halinde envantere ekler.
+    Zaten var olan (veya dosyada tekrar eden) shortid'ler atlanır; shortid'i
+    boş ya da geçersiz satırlar `invalid` olarak sayılır.
+    """
+    result = ImportResult()
+    chunk: List[Dict[str, str]] = []
+    for row in _row_reader(stream, columns):
+        if not _SHORTID_RE.match(row.get("shortid", "")):
+            result.invalid += 1
+            continue
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, default_status, default_batch, result)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, default_status, default_batch, result)
+    return result
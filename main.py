@@ -1,11 +1,12 @@
 import csv
+import hashlib
 import io
 import os
-import secrets
-import zipfile
-from datetime import datetime, timedelta
+import re
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
 
 from fastapi import FastAPI
 from fastapi import File, Form, HTTPException, Request, UploadFile
@@ -14,30 +15,67 @@ from fastapi.responses import (
     JSONResponse,
     PlainTextResponse,
     RedirectResponse,
+    Response,
     StreamingResponse,
 )
 from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.sql import func
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
-import qrcode
-from qrcode.image.pil import PilImage
-
+from assets import ASSET_URL_PREFIX, CompressionMiddleware, PrecompressedStaticFiles, build_assets
 from auth import (
     SECRET_KEY,
+    AuthContextMiddleware,
+    CurrentUser,
     clear_session_cookie,
+    get_current_user,
     get_current_user_id,
-    hash_password,
+    hash_password_async,
+    password_pool,
     set_session_cookie,
-    verify_password,
+    user_cache,
+    verify_password_async,
+)
+from clicks import click_writer
+from db import (
+    Profile,
+    Tag,
+    User,
+    dispose_async_engine,
+    get_async_read_session,
+    get_async_session,
+    get_read_session,
+    get_session,
+    init_db,
+    pool_stats,
+)
+from export import EXPORT_COLUMNS, EXPORT_FORMATS, csv_row, date_range, iter_clicks, iter_ndjson
+from images import UploadLimitMiddleware, avatar_sources, save_avatar
+from inventory import FILE_COLUMNS, TAG_GENERATE_MAX, bulk_generate, import_csv
+from metrics import METRICS_ENABLED, METRICS_TOKEN, MetricsMiddleware, registry, template_render_duration
+from profile_cache import profile_cache
+from profiler import SQL_PROFILE, SQLProfilerMiddleware
+from qr_cache import clamp_params, qr_cache
+from qr_zip import shutdown_pool, stream_qr_zip
+from stats import (
+    GRANULARITIES,
+    HOURLY_MAX_DAYS,
+    STATS_BATCH_MAX_IDS,
+    batch_series,
+    daily_series,
+    device_breakdown,
+    owner_summary,
+    unique_visitors,
 )
-from db import Click, Profile, Tag, User, get_session, init_db
+from storage import UPLOAD_DIR, UploadStaticFiles, swap_blob_reference, upload_storage
+from useragents import ua_interner
 
 # Yollar & klasörler
 BASE_DIR = Path(__file__).parent
-UPLOAD_DIR = BASE_DIR / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 STATIC_DIR = BASE_DIR / "static"
 STATIC_DIR.mkdir(exist_ok=True)
 
@@ -56,9 +94,26 @@ if not SECRET_KEY:
 
 # FastAPI & template
 app = FastAPI()
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+app.mount("/uploads", UploadStaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+# Özetli ve önceden sıkıştırılmış kopyalar; base.html bunlara asset_url() ile bağlanır
+assets = build_assets(STATIC_DIR)
+app.mount(ASSET_URL_PREFIX, PrecompressedStaticFiles(directory=str(assets.build_dir)), name="assets")
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+templates.env.globals["asset_url"] = assets.url
+
+
+def _templates_fingerprint() -> str:
+    # Şablon değişince (deploy) eski ETag'lerin 304 almaması için
+    digest = hashlib.sha256()
+    for path in sorted((BASE_DIR / "templates").rglob("*.html")):
+        digest.update(path.read_bytes())
+    # Statik dosya değişince şablondaki asset adresleri de değişir
+    digest.update(assets.version.encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+TEMPLATES_VERSION = _templates_fingerprint()
 
 
 # --- Public URL yardımcıları ---
@@ -102,6 +157,43 @@ def _optional_public_tag_url(shortid: str) -> Optional[str]:
     return f"{base_url}/t/{shortid}"
 
 
+# --- HTTP önbellek (koşullu GET) yardımcıları ---
+
+def _strong_etag(*parts: object) -> str:
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Yalnızca If-None-Match'e bakılır. Yanıtlar izleyiciye, sahibe, şablon
+    sürümüne ve PUBLIC_BASE_URL'e de bağlı olduğundan tek bir değişiklik zamanı
+    bunları temsil edemez; Last-Modified gönderilmez, If-Modified-Since 304
+    üretmez.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _validator_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def _content_disposition(filename: str, disposition: str = "attachment") -> str:
+    """
+    Tırnaklı ASCII `filename` (güvensiz karakterler `_`) ve özgün adı taşıyan
+    RFC 5987 `filename*` biçimi.
+    """
+    fallback = _UNSAFE_FILENAME_RE.sub("_", filename)
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
 def render_template(
     request: Request, template_name: str, context: Optional[Dict] = None, status_code: int = 200
 ) -> HTMLResponse:
@@ -117,12 +209,23 @@ def render_template(
     }
     if context:
         payload.update(context)
-    return templates.TemplateResponse(template_name, payload, status_code=status_code)
+    with template_render_duration.time(template_name):
+        return templates.TemplateResponse(template_name, payload, status_code=status_code)
 
 
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
+    click_writer.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    # Kuyrukta bekleyen okutmaları kaybetmemek için son kez yaz
+    await run_in_threadpool(click_writer.stop)
+    shutdown_pool()
+    password_pool.shutdown()
+    await dispose_async_engine()
 
 
 @app.get("/health", response_class=PlainTextResponse)
@@ -130,6 +233,22 @@ def health() -> str:
     return "ok"
 
 
+registry.register_stats("click_writer", click_writer.stats)
+registry.register_stats("qr_cache", qr_cache.stats)
+registry.register_stats("profile_cache", profile_cache.stats)
+registry.register_stats("user_cache", user_cache.stats)
+registry.register_stats("password_pool", password_pool.stats)
+registry.register_stats("ua_cache", ua_interner.stats)
+registry.register_stats("db_pool", pool_stats)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics(request: Request) -> Response:
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Yetkisiz")
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def _sanitize_next(url_value: Optional[str]) -> str:
     """
     Açık yönlendirmeyi engelle: yalnızca site içi path'e izin ver.
@@ -142,15 +261,37 @@ def _sanitize_next(url_value: Optional[str]) -> str:
     return url_value
 
 
-def _load_user(user_id: Optional[int]) -> Optional[User]:
-    if not user_id:
+async def _load_user(user_id: int) -> Optional[CurrentUser]:
+    async with get_async_read_session() as session:
+        user = await session.get(User, user_id)
+    if not user:
         return None
-    with get_session() as session:
-        return session.get(User, user_id)
+    return CurrentUser(id=user.id, email=user.email, is_admin=user.email in ADMIN_EMAILS)
+
+
+async def _cached_user(user_id: int) -> Optional[CurrentUser]:
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await _load_user(user_id)
+        if user is not None:
+            user_cache.put(user)
+    return user
+
 
+# Oturum çerezi istek başına bir kez çözülür; handler'lar request.state'ten okur
+# Görsel yüklemelerinin boyutu multipart ayrıştırıcı gövdeyi diske yazmadan önce sınırlanır
+app.add_middleware(UploadLimitMiddleware)
+app.add_middleware(AuthContextMiddleware, loader=_load_user)
+app.add_middleware(CompressionMiddleware)
+if SQL_PROFILE:
+    app.add_middleware(SQLProfilerMiddleware)
+if METRICS_ENABLED:
+    # En dışta: sıkıştırma ve oturum çözme dahil toplam süre
+    app.add_middleware(MetricsMiddleware, routes=app.routes)
 
-def _ensure_admin(user: User) -> None:
-    if user.email not in ADMIN_EMAILS:
+
+def _ensure_admin(user: CurrentUser) -> None:
+    if not user.is_admin:
         raise HTTPException(status_code=403, detail="Admin yetkisi gerekli")
 
 
@@ -189,7 +330,7 @@ def register_form(
 
 
 @app.post("/register")
-def register_submit(
+async def register_submit(
     request: Request,
     email: str = Form(...),
     password: str = Form(...),
@@ -207,45 +348,68 @@ def register_submit(
             error="NFC etiketini okutmadan kayıt olamazsınız.",
         )
 
-    with get_session() as session:
-        existing_user = session.exec(select(User).where(User.email == email)).first()
-        if existing_user:
-            return register_form(
-                request,
-                pending_shortid=pending_shortid,
-                next=next_url,
-                error="Bu e-posta zaten kayıtlı. Lütfen giriş yapın.",
-            )
+    async with get_async_read_session() as session:
+        existing_user = (await session.exec(select(User).where(User.email == email))).first()
+        tag = (await session.exec(select(Tag).where(Tag.shortid == pending_shortid))).first()
+    if existing_user:
+        return register_form(
+            request,
+            pending_shortid=pending_shortid,
+            next=next_url,
+            error="Bu e-posta zaten kayıtlı. Lütfen giriş yapın.",
+        )
+    if not tag:
+        return register_form(
+            request,
+            pending_shortid=None,
+            next=next_url,
+            error="Bu shortid sistemde bulunamadı. Lütfen önce etiketi envantere ekleyin.",
+        )
+    if tag.owner_user_id is not None:
+        return register_form(
+            request,
+            pending_shortid=None,
+            next=next_url,
+            error="Bu etiket zaten başka bir kullanıcıya atanmış.",
+        )
 
-        tag = session.exec(select(Tag).where(Tag.shortid == pending_shortid)).first()
-        if not tag:
+    # bcrypt ayrı havuzda ve yazma bağlantısı tutulmadan çalışır
+    password_hash = await hash_password_async(password)
+
+    async with get_async_session() as session:
+        tag = await session.get(Tag, tag.id)
+        if tag is None or tag.owner_user_id is not None:
             return register_form(
                 request,
                 pending_shortid=None,
                 next=next_url,
-                error="Bu shortid sistemde bulunamadı. Lütfen önce etiketi envantere ekleyin.",
+                error="Bu etiket zaten başka bir kullanıcıya atanmış.",
             )
-        if tag.owner_user_id is not None:
+        user = User(email=email, password_hash=password_hash, name=name)
+        session.add(user)
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Aynı e-postayla eşzamanlı kayıt: UNIQUE(email) ikincisini reddeder
+            await session.rollback()
             return register_form(
                 request,
-                pending_shortid=None,
+                pending_shortid=pending_shortid,
                 next=next_url,
-                error="Bu etiket zaten başka bir kullanıcıya atanmış.",
+                error="Bu e-posta zaten kayıtlı. Lütfen giriş yapın.",
             )
-
-        user = User(email=email, password_hash=hash_password(password), name=name)
-        session.add(user)
-        session.commit()
-        session.refresh(user)
+        await session.refresh(user)
+        user_cache.invalidate(user.id)
 
         tag.owner_user_id = user.id
         session.add(tag)
 
-        profile = session.exec(select(Profile).where(Profile.tag_id == tag.id)).first()
+        profile = (await session.exec(select(Profile).where(Profile.tag_id == tag.id))).first()
         if not profile:
             profile = Profile(tag_id=tag.id)
             session.add(profile)
-        session.commit()
+        await session.commit()
+    profile_cache.invalidate(pending_shortid)
 
     # Kayıttan sonra doğrudan edit'e (just claimed) yönlendir
     destination = _sanitize_next(next_url) or f"/edit/{pending_shortid}?claimed=1"
@@ -281,17 +445,28 @@ def login_form(
 
 
 @app.post("/login")
-def login_submit(
+async def login_submit(
     request: Request,
     email: str = Form(...),
     password: str = Form(...),
     next_url: str = Form("/dashboard"),
 ):
     email = email.strip().lower()
-    with get_session() as session:
-        user = session.exec(select(User).where(User.email == email)).first()
-        if not user or not verify_password(password, user.password_hash):
-            return RedirectResponse(url="/login?e=invalid", status_code=303)
+    async with get_async_read_session() as session:
+        user = (await session.exec(select(User).where(User.email == email))).first()
+    if not user:
+        return RedirectResponse(url="/login?e=invalid", status_code=303)
+    valid, upgraded_hash = await verify_password_async(password, user.password_hash)
+    if not valid:
+        return RedirectResponse(url="/login?e=invalid", status_code=303)
+    if upgraded_hash:
+        # Eski bcrypt maliyetiyle üretilmiş hash'i güncel maliyetle değiştir
+        async with get_async_session() as session:
+            await session.exec(
+                update(User).where(User.id == user.id).values(password_hash=upgraded_hash)
+            )
+            await session.commit()
+        user_cache.invalidate(user.id)
 
     destination = _sanitize_next(next_url)
     response = RedirectResponse(url=destination, status_code=303)
@@ -307,26 +482,24 @@ def logout():
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
-def dashboard(request: Request):
+async def dashboard(request: Request):
     user_id = get_current_user_id(request)
     if not user_id:
         return RedirectResponse(url="/login", status_code=303)
 
-    with get_session() as session:
-        tags = session.exec(select(Tag).where(Tag.owner_user_id == user_id).order_by(Tag.created_at)).all()
-        tag_cards = []
-        for tag in tags:
-            count_result = session.exec(select(func.count(Click.id)).where(Click.tag_id == tag.id)).first()
-            click_count = int(count_result or 0)
-            tag_cards.append(
-                {
-                    "shortid": tag.shortid,
-                    "count": int(click_count or 0),
-                    "created_at": tag.created_at,
-                }
-            )
-        user = session.get(User, user_id)
-    is_admin = bool(user and user.email in ADMIN_EMAILS)
+    async with get_async_read_session() as session:
+        summary = await owner_summary(session, user_id)
+    tag_cards = [
+        {
+            "shortid": tag.shortid,
+            "count": tag.count,
+            "created_at": tag.created_at,
+            "sparkline": tag.sparkline,
+        }
+        for tag in summary.tags
+    ]
+    user = get_current_user(request)
+    is_admin = bool(user and user.is_admin)
 
     return render_template(
         request,
@@ -334,14 +507,16 @@ def dashboard(request: Request):
         {
             "tags": tag_cards,
             "is_admin": is_admin,
+            "generate_max": TAG_GENERATE_MAX,
         },
     )
 
 
 @app.get("/claim-info/{shortid}", response_class=HTMLResponse)
-def claim_info(request: Request, shortid: str):
-    with get_session() as session:
-        tag = session.exec(select(Tag).where(Tag.shortid == shortid)).first()
+async def claim_info(request: Request, shortid: str):
+    user_id = get_current_user_id(request)
+    async with get_async_read_session() as session:
+        tag = (await session.exec(select(Tag).where(Tag.shortid == shortid))).first()
     if not tag:
         return render_template(
             request,
@@ -355,14 +530,14 @@ def claim_info(request: Request, shortid: str):
         )
 
     if tag.owner_user_id:
-        owner = _load_user(tag.owner_user_id)
-        is_owner = tag.owner_user_id == get_current_user_id(request)
+        owner = await _cached_user(tag.owner_user_id)
+        is_owner = tag.owner_user_id == user_id
         return render_template(
             request,
             "claim_info.html",
             {
                 "shortid": shortid,
-                "logged_in": bool(get_current_user_id(request)),
+                "logged_in": bool(user_id),
                 "already_claimed": True,
                 "owner_email": owner.email if owner else None,
                 "support_email": SUPPORT_EMAIL,
@@ -378,7 +553,7 @@ def claim_info(request: Request, shortid: str):
         "claim_info.html",
         {
             "shortid": shortid,
-            "logged_in": bool(get_current_user_id(request)),
+            "logged_in": bool(user_id),
             "login_url": login_target,
             "register_url": register_target,
             "already_claimed": False,
@@ -432,15 +607,24 @@ def claim_submit(request: Request, shortid: str):
             profile = Profile(tag_id=tag.id)
             session.add(profile)
         session.commit()
+    profile_cache.invalidate(shortid)
 
     return RedirectResponse(url=f"/edit/{shortid}?claimed=1", status_code=303)
 
 
+def _profile_version(tag: Tag, profile: Optional[Profile]) -> str:
+    """
+    Public profil sayfasının içeriğini belirleyen sürüm: sahip + son güncelleme.
+    """
+    updated = profile.updated_at.isoformat() if profile and profile.updated_at else "-"
+    return f"{tag.owner_user_id}:{updated}"
+
+
 @app.get("/t/{shortid}", response_class=HTMLResponse)
-def show_tag(request: Request, shortid: str):
+async def show_tag(request: Request, shortid: str):
     current_user_id = get_current_user_id(request)
-    with get_session() as session:
-        tag = session.exec(select(Tag).where(Tag.shortid == shortid)).first()
+    async with get_async_read_session() as session:
+        tag = (await session.exec(select(Tag).where(Tag.shortid == shortid))).first()
         if not tag:
             return render_template(
                 request,
@@ -455,33 +639,52 @@ def show_tag(request: Request, shortid: str):
         if not tag.owner_user_id:
             return RedirectResponse(url=f"/claim-info/{shortid}", status_code=303)
 
-        profile = session.exec(select(Profile).where(Profile.tag_id == tag.id)).first()
-        try:
-            ip = request.client.host if request.client else None
-            ua = request.headers.get("user-agent")
-            session.add(Click(tag_id=tag.id, ip=ip, ua=ua))
-            session.commit()
-        except Exception:
-            session.rollback()
-        profile_data = None
-        if profile:
-            profile_data = {
-                "full_name": profile.full_name,
-                "title": profile.title,
-                "description": profile.description,
-                "link": profile.link,
-                "image_url": profile.image_url,
-                "phone": profile.phone,
-                "public_email": profile.public_email,
-                "instagram": profile.instagram,
-                "linkedin": profile.linkedin,
-                "facebook": profile.facebook,
-                "whatsapp": profile.whatsapp,
-                "iban": profile.iban,
-                "theme_color": profile.theme_color,
-            }
+        profile = (await session.exec(select(Profile).where(Profile.tag_id == tag.id))).first()
+        # Okutma kaydı istek yolunda commit edilmez; arka plandaki yazıcı toplu yazar
+        ip = request.client.host if request.client else None
+        click_writer.record(tag.id, ip, request.headers.get("user-agent"))
+
+    # Giriş yapmamış ziyaretçiler aynı HTML'i görür; yalnızca onlar önbellekten beslenir
+    anonymous = current_user_id is None
+    version = _profile_version(tag, profile)
+
+    # Sayfa izleyiciye göre değiştiği için (sahip butonu, menü) ETag izleyiciyi de içerir
+    etag = _strong_etag(shortid, version, current_user_id, PUBLIC_BASE_URL, TEMPLATES_VERSION)
+    validators = _validator_headers(etag, "no-cache")
+    validators["Vary"] = "Cookie"
+    if _is_not_modified(request, etag):
+        return Response(status_code=304, headers=validators)
+
+    # Şablonda isteğin Host'undan türeyen bir adres (url_for vb.) olursa başka bir
+    # Host ile gelen ziyaretçiye sızmasın: önbellek girdisi köke bağlıdır. Kök
+    # ayarlıysa PUBLIC_BASE_URL'dir; böylece keyfi Host başlıkları girdileri
+    # birbirinin yerine yazıp sıcak sayfaları önbellekten atamaz
+    cache_version = f"{version}|{PUBLIC_BASE_URL or request.base_url}"
+    if anonymous:
+        cached = profile_cache.get(shortid, cache_version)
+        if cached is not None:
+            return HTMLResponse(cached, headers={**validators, "X-Profile-Cache": "hit"})
+
+    profile_data = None
+    if profile:
+        profile_data = {
+            "full_name": profile.full_name,
+            "title": profile.title,
+            "description": profile.description,
+            "link": profile.link,
+            "image_url": profile.image_url,
+            "avatar": avatar_sources(profile.image_url),
+            "phone": profile.phone,
+            "public_email": profile.public_email,
+            "instagram": profile.instagram,
+            "linkedin": profile.linkedin,
+            "facebook": profile.facebook,
+            "whatsapp": profile.whatsapp,
+            "iban": profile.iban,
+            "theme_color": profile.theme_color,
+        }
 
-    return render_template(
+    response = render_template(
         request,
         "tag.html",
         {
@@ -491,6 +694,11 @@ def show_tag(request: Request, shortid: str):
             "is_owner": bool(tag.owner_user_id and tag.owner_user_id == current_user_id),
         },
     )
+    if anonymous:
+        profile_cache.put(shortid, cache_version, response.body)
+        response.headers["X-Profile-Cache"] = "miss"
+    response.headers.update(validators)
+    return response
 
 
 @app.get("/edit/{shortid}", response_class=HTMLResponse)
@@ -544,27 +752,28 @@ async def edit_submit(
     if not user_id:
         return RedirectResponse(url="/login", status_code=303)
 
-    with get_session() as session:
-        tag = session.exec(select(Tag).where(Tag.shortid == shortid)).first()
+    async with get_async_read_session() as session:
+        owner_id = (await session.exec(select(Tag.owner_user_id).where(Tag.shortid == shortid))).first()
+    if owner_id is None or owner_id != user_id:
+        raise HTTPException(status_code=404, detail="Tag bulunamadı")
+
+    # Görsel yazma bağlantısı tutulmadan işlenir: akış halinde okunur, boyutu
+    # sınırlıdır ve varyantlar thread havuzunda üretilir
+    image_url = None
+    if image and image.filename:
+        image_url = await save_avatar(image, upload_storage)
+
+    async with get_async_session() as session:
+        tag = (await session.exec(select(Tag).where(Tag.shortid == shortid))).first()
         if not tag or tag.owner_user_id != user_id:
             raise HTTPException(status_code=404, detail="Tag bulunamadı")
-        profile = session.exec(select(Profile).where(Profile.tag_id == tag.id)).first()
+        profile = (await session.exec(select(Profile).where(Profile.tag_id == tag.id))).first()
         if not profile:
             profile = Profile(tag_id=tag.id)
-            session.add(profile)
-            session.commit()
-            session.refresh(profile)
-
-        if image and image.filename:
-            ext = os.path.splitext(image.filename)[1].lower()
-            if ext not in {".jpg", ".jpeg", ".png", ".webp"}:
-                ext = ".jpg"
-            safe_name = f"{shortid}{ext}"
-            dest = UPLOAD_DIR / safe_name
-            content = await image.read()
-            with dest.open("wb") as output:
-                output.write(content)
-            profile.image_url = f"/uploads/{safe_name}"
+        if image_url:
+            # Referans sayısı profil ile aynı transaction'da güncellenir
+            await swap_blob_reference(session, profile.image_url, image_url)
+            profile.image_url = image_url
 
         instagram_value = instagram.strip()
         if instagram_value and not instagram_value.startswith("http"):
@@ -605,54 +814,112 @@ async def edit_submit(
         profile.updated_at = datetime.utcnow()
 
         session.add(profile)
-        session.commit()
+        await session.commit()
+    profile_cache.invalidate(shortid)
 
     return RedirectResponse(url=f"/t/{shortid}", status_code=303)
 
 
-def generate_shortid(length: int = 8) -> str:
-    token = secrets.token_urlsafe(length)
-    return token.replace("-", "").replace("_", "")[:length]
+def _warm_qr_cache(shortids: List[str]) -> None:
+    """
+    Yeni envantere giren tag'lerin varsayılan boyuttaki QR'larını arka planda üret.
+    """
+    base_url, issue = _public_base_url_status()
+    if issue or not base_url or not shortids:
+        return
+    qr_cache.warm(f"{base_url}/t/{sid}" for sid in shortids)
+
+
+def _iter_csv(header: List[str], rows: Iterable[Iterable], chunk_rows: int = 1000) -> Iterator[bytes]:
+    """
+    CSV'yi satır parçaları halinde UTF-8 olarak üretir (StreamingResponse için).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    pending = 1
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _export_response(
+    fmt: str, filename: str, tag_id: Optional[int], start: Optional[date], end: Optional[date]
+) -> StreamingResponse:
+    """
+    Click satırlarını CSV ya da NDJSON olarak akıtır. Handler'lar senkron
+    olmalı: üreteç thread havuzunda gezilir, olay döngüsü okuma sırasında
+    serbest kalır.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format şunlardan biri olmalı: {', '.join(EXPORT_FORMATS)}")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="Başlangıç tarihi bitişten sonra olamaz")
+    lower, upper = date_range(start, end)
+    rows = iter_clicks(tag_id, lower, upper)
+    suffix = "_".join(part.isoformat() for part in (start, end) if part)
+    name = f"{filename}_{suffix}" if suffix else filename
+    headers = {"Content-Disposition": _content_disposition(f"{name}.{fmt}")}
+    if fmt == "ndjson":
+        return StreamingResponse(iter_ndjson(rows), media_type="application/x-ndjson", headers=headers)
+    return StreamingResponse(
+        _iter_csv(EXPORT_COLUMNS, (csv_row(row) for row in rows)),
+        media_type="text/csv; charset=utf-8",
+        headers=headers,
+    )
 
 
 @app.post("/admin/generate")
 def admin_generate(request: Request, n: int = Form(10)):
-    user = _load_user(get_current_user_id(request))
+    user = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     _ensure_admin(user)
 
-    created: List[str] = []
-    n = max(1, min(int(n), 1000))
-    with get_session() as session:
-        for _ in range(n):
-            candidate = generate_shortid(8)
-            while session.exec(select(Tag).where(Tag.shortid == candidate)).first():
-                candidate = generate_shortid(8)
-            session.add(Tag(shortid=candidate))
-            session.commit()
-            created.append(candidate)
+    n = max(1, min(int(n), TAG_GENERATE_MAX))
+    created = bulk_generate(n)
+    _warm_qr_cache(created)
 
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(["shortid"])
-    for sid in created:
-        writer.writerow([sid])
-    buffer.seek(0)
-
-    output = io.BytesIO(buffer.getvalue().encode("utf-8"))
-    output.seek(0)
-    headers = {"Content-Disposition": "attachment; filename=generated_tags.csv"}
+    headers = {"Content-Disposition": _content_disposition("generated_tags.csv")}
     return StreamingResponse(
-        output,
+        _iter_csv(["shortid"], ([sid] for sid in created)),
         media_type="text/csv; charset=utf-8",
         headers=headers,
     )
 
 
+@app.get("/admin/export/clicks")
+def admin_export_clicks(
+    request: Request,
+    format: str = "csv",
+    shortid: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    user = get_current_user(request)
+    if not user:
+        return RedirectResponse(url="/login", status_code=303)
+    _ensure_admin(user)
+
+    tag_id = None
+    if shortid:
+        with get_read_session() as session:
+            tag_id = session.exec(select(Tag.id).where(Tag.shortid == shortid)).first()
+        if tag_id is None:
+            raise HTTPException(status_code=404, detail="Tag bulunamadı")
+    return _export_response(format, f"clicks_{shortid}" if shortid else "clicks", tag_id, start, end)
+
+
 @app.get("/admin/unassigned", response_class=HTMLResponse)
 def admin_unassigned(request: Request):
-    user = _load_user(get_current_user_id(request))
+    user = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     _ensure_admin(user)
@@ -668,29 +935,38 @@ def admin_unassigned(request: Request):
 
 
 @app.post("/admin/inventory_import")
-def admin_inventory_import(request: Request, csv_text: str = Form("")):
-    user = _load_user(get_current_user_id(request))
+def admin_inventory_import(
+    request: Request,
+    csv_text: str = Form(""),
+    csv_file: UploadFile | None = File(None),
+    status: str = Form("active"),
+    batch_label: str = Form(""),
+):
+    user = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     _ensure_admin(user)
 
-    rows = [row.strip() for row in csv_text.splitlines() if row.strip()]
-    created = 0
-    skipped = 0
-    with get_session() as session:
-        for row in rows:
-            candidate = row.split(",")[0].strip()
-            if not candidate:
-                continue
-            exists = session.exec(select(Tag).where(Tag.shortid == candidate)).first()
-            if exists:
-                skipped += 1
-                continue
-            session.add(Tag(shortid=candidate))
-            session.commit()
-            created += 1
+    # Dosya yüklendiyse diskteki geçici dosyadan akış halinde okunur
+    # Metin kutusunda yalnızca ilk kolon (shortid) dikkate alınır
+    if csv_file and csv_file.filename:
+        stream = io.TextIOWrapper(csv_file.file, encoding="utf-8-sig", newline="")
+        columns = FILE_COLUMNS
+    else:
+        stream = io.StringIO(csv_text)
+        columns = ("shortid",)
+    try:
+        result = import_csv(
+            stream,
+            default_status=status.strip() or "active",
+            default_batch=batch_label.strip() or None,
+            columns=columns,
+        )
+    except (UnicodeDecodeError, csv.Error):
+        raise HTTPException(status_code=400, detail="CSV okunamadı (UTF-8 olmalı)")
+    _warm_qr_cache(result.created_ids)
     return RedirectResponse(
-        url=f"/admin/unassigned?import_ok={created}&skip={skipped}",
+        url=f"/admin/unassigned?import_ok={result.created}&skip={result.skipped}&invalid={result.invalid}",
         status_code=303,
     )
 
@@ -702,7 +978,7 @@ def admin_qr_zip(
     size: int = Form(10),
     border: int = Form(4),
 ):
-    user = _load_user(get_current_user_id(request))
+    user = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     _ensure_admin(user)
@@ -711,61 +987,47 @@ def admin_qr_zip(
     if not raw:
         raise HTTPException(status_code=400, detail="ID listesi boş")
 
+    # Tekrarları at, sırayı koru; varlık kontrolü parça başına tek IN sorgusu
+    requested = list(dict.fromkeys(raw))
+    known = set()
     with get_session() as session:
-        valid_ids = [sid for sid in raw if session.exec(select(Tag).where(Tag.shortid == sid)).first()]
+        for start in range(0, len(requested), 500):
+            chunk = requested[start : start + 500]
+            known.update(session.exec(select(Tag.shortid).where(Tag.shortid.in_(chunk))).all())
+    valid_ids = [sid for sid in requested if sid in known]
     if not valid_ids:
         raise HTTPException(status_code=400, detail="Geçerli shortid bulunamadı")
 
-    memory = io.BytesIO()
     base_url = _require_public_base_url()
-
-    with zipfile.ZipFile(memory, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
-        for sid in valid_ids:
-            url = f"{base_url}/t/{sid}"
-            qr = qrcode.QRCode(
-                version=None,
-                error_correction=qrcode.constants.ERROR_CORRECT_Q,
-                box_size=max(1, min(int(size), 20)),
-                border=max(1, min(int(border), 10)),
-            )
-            qr.add_data(url)
-            qr.make(True)
-            img: PilImage = qr.make_image(fill_color="black", back_color="white")
-            buf = io.BytesIO()
-            img.save(buf, format="PNG")
-            archive.writestr(f"qr_{sid}.png", buf.getvalue())
-    memory.seek(0)
-    headers = {"Content-Disposition": "attachment; filename=qr_bulk.zip"}
-    return StreamingResponse(memory, media_type="application/zip", headers=headers)
+    box_size, border = clamp_params(size, border)
+    items = ((f"qr_{sid}.png", f"{base_url}/t/{sid}") for sid in valid_ids)
+    headers = {"Content-Disposition": _content_disposition("qr_bulk.zip")}
+    return StreamingResponse(stream_qr_zip(items, box_size, border), media_type="application/zip", headers=headers)
 
 
 @app.get("/qr/{shortid}")
-def qr_code(shortid: str, size: int = 10, border: int = 4):
-    with get_session() as session:
-        tag = session.exec(select(Tag).where(Tag.shortid == shortid)).first()
+async def qr_code(request: Request, shortid: str, size: int = 10, border: int = 4):
+    async with get_async_read_session() as session:
+        tag = (await session.exec(select(Tag).where(Tag.shortid == shortid))).first()
         if not tag:
             raise HTTPException(status_code=404, detail="Tag bulunamadı")
 
     base_url = _require_public_base_url()
-    target_url = f"{base_url}/t/{shortid}"
-    qr = qrcode.QRCode(
-        version=None,
-        error_correction=qrcode.constants.ERROR_CORRECT_Q,
-        box_size=max(1, min(int(size), 20)),
-        border=max(1, min(int(border), 10)),
-    )
-    qr.add_data(target_url)
-    qr.make(True)
-    img: PilImage = qr.make_image(fill_color="black", back_color="white")
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    headers = {"Content-Disposition": f'inline; filename="qr_{shortid}.png"'}
-    return StreamingResponse(buf, media_type="image/png", headers=headers)
+    box_size, border = clamp_params(size, border)
+    # Görsel yalnızca bu girdilere bağlı; eşleşirse QR hiç üretilmez
+    etag = _strong_etag(shortid, box_size, border, base_url)
+    validators = _validator_headers(etag, "public, max-age=86400")
+    if _is_not_modified(request, etag):
+        return Response(status_code=304, headers=validators)
+
+    # Önbellekte yoksa QR üretimi CPU'ya bağlı; event loop'u bloklamasın
+    png = await run_in_threadpool(qr_cache.get_png, f"{base_url}/t/{shortid}", box_size, border)
+    headers = {"Content-Disposition": _content_disposition(f"qr_{shortid}.png", "inline"), **validators}
+    return Response(png, media_type="image/png", headers=headers)
 
 
 @app.get("/api/options")
-def api_options(request: Request) -> Dict:
+async def api_options(request: Request) -> Dict:
     user_id = get_current_user_id(request)
     if not user_id:
         return {
@@ -781,10 +1043,10 @@ def api_options(request: Request) -> Dict:
             ],
         }
 
-    with get_session() as session:
-        user = session.get(User, user_id)
-        tags = session.exec(select(Tag).where(Tag.owner_user_id == user_id).order_by(Tag.created_at)).all()
-    is_admin = bool(user and user.email in ADMIN_EMAILS)
+    async with get_async_read_session() as session:
+        summary = await owner_summary(session, user_id)
+    user = get_current_user(request)
+    is_admin = bool(user and user.is_admin)
 
     sections: List[Dict] = [
         {
@@ -795,14 +1057,17 @@ def api_options(request: Request) -> Dict:
         }
     ]
 
-    for tag in tags:
+    for tag in summary.tags:
+        count = tag.count
         sections.append(
             {
                 "title": f"Tag {tag.shortid}",
+                "count": count,
+                "sparkline": tag.sparkline,
                 "items": [
                     {"name": "Profili Gör", "url": f"/t/{tag.shortid}", "icon": "person-badge"},
                     {"name": "Profili Düzenle", "url": f"/edit/{tag.shortid}", "icon": "pencil-square"},
-                    {"name": "İstatistikler", "url": f"/stats/{tag.shortid}", "icon": "graph-up"},
+                    {"name": f"İstatistikler ({count})", "url": f"/stats/{tag.shortid}", "icon": "graph-up"},
                     {"name": "QR Kod", "url": f"/qr/{tag.shortid}", "icon": "qr-code"},
                 ],
             }
@@ -823,29 +1088,110 @@ def api_options(request: Request) -> Dict:
     return {"role": "admin" if is_admin else "user", "sections": sections}
 
 
+# Sabit yol {shortid} rotasından önce tanımlanmalı
+@app.get("/api/stats/batch")
+async def api_stats_batch(request: Request, ids: str = "", granularity: str = "day", days: int = 7):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Giriş yapmanız gerekiyor")
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity şunlardan biri olmalı: {', '.join(GRANULARITIES)}")
+    requested = list(dict.fromkeys(ids.replace(",", " ").split()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="ID listesi boş")
+    if len(requested) > STATS_BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"En fazla {STATS_BATCH_MAX_IDS} tag istenebilir")
+    days = max(1, min(days, HOURLY_MAX_DAYS if granularity == "hour" else 90))
+
+    async with get_async_read_session() as session:
+        # Varlık ve sahiplik tüm liste için tek sorguda
+        rows = (await session.exec(
+            select(Tag.id, Tag.shortid, Tag.owner_user_id).where(Tag.shortid.in_(requested))
+        )).all()
+        found = {shortid: (tag_id, owner_id) for tag_id, shortid, owner_id in rows}
+        missing = [sid for sid in requested if sid not in found]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Tag bulunamadı: {', '.join(missing[:20])}")
+        if not user.is_admin and any(found[sid][1] != user.id for sid in requested):
+            raise HTTPException(status_code=403, detail="Yetkisiz erişim")
+        labels, series = await batch_series(session, [found[sid][0] for sid in requested], granularity, days)
+
+    by_shortid = {sid: series[found[sid][0]] for sid in requested}
+    return JSONResponse(
+        {
+            "granularity": granularity,
+            "days": days,
+            "labels": labels,
+            "series": by_shortid,
+            "totals": {sid: sum(values) for sid, values in by_shortid.items()},
+        }
+    )
+
+
+async def _stats_tag(session, request: Request, shortid: str) -> Tag:
+    """
+    Tag'e özel istatistik uçları yalnızca sahibine ve adminlere açıktır.
+    """
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Giriş yapmanız gerekiyor")
+    tag = (await session.exec(select(Tag).where(Tag.shortid == shortid))).first()
+    if not tag:
+        raise HTTPException(status_code=404, detail="Tag bulunamadı")
+    if tag.owner_user_id != user.id and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Yetkisiz erişim")
+    return tag
+
+
 @app.get("/api/stats/{shortid}")
-def api_stats(shortid: str, days: int = 7):
+async def api_stats(request: Request, shortid: str, days: int = 7):
     days = max(1, min(days, 90))
-    with get_session() as session:
+    async with get_async_read_session() as session:
+        # Tekil ziyaretçi sayısı IP + UA özetlerinden türetildiği için herkese açık değil
+        tag = await _stats_tag(session, request, shortid)
+        labels, values = await daily_series(session, tag.id, days)
+        uniques = await unique_visitors(session, tag.id, days)
+    return JSONResponse(
+        {"labels": labels, "values": values, "unique_visitors": uniques, "shortid": shortid, "days": days}
+    )
+
+
+@app.get("/api/stats/{shortid}/devices")
+async def api_stats_devices(request: Request, shortid: str, days: int = 30):
+    days = max(1, min(days, 90))
+    async with get_async_read_session() as session:
+        tag = await _stats_tag(session, request, shortid)
+        breakdown = await device_breakdown(session, tag.id, days)
+    return JSONResponse(
+        {
+            "shortid": shortid,
+            "days": days,
+            "total": breakdown.total,
+            "device": breakdown.device,
+            "os": breakdown.os,
+            "browser": breakdown.browser,
+        }
+    )
+
+
+@app.get("/api/stats/{shortid}/export")
+def api_stats_export(
+    request: Request,
+    shortid: str,
+    format: str = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Giriş yapmanız gerekiyor")
+    with get_read_session() as session:
         tag = session.exec(select(Tag).where(Tag.shortid == shortid)).first()
-        if not tag:
-            raise HTTPException(status_code=404, detail="Tag bulunamadı")
-        start_date = datetime.utcnow().date() - timedelta(days=days - 1)
-        rows = session.exec(
-            select(func.date(Click.timestamp).label("d"), func.count(Click.id))
-            .where(Click.tag_id == tag.id, Click.timestamp >= start_date)
-            .group_by(func.date(Click.timestamp))
-            .order_by(func.date(Click.timestamp))
-        ).all()
-    by_day = {row[0]: row[1] for row in rows}
-    labels: List[str] = []
-    values: List[int] = []
-    for i in range(days):
-        day = start_date + timedelta(days=i)
-        key = day.isoformat()
-        labels.append(key)
-        values.append(int(by_day.get(key, 0)))
-    return JSONResponse({"labels": labels, "values": values, "shortid": shortid, "days": days})
+    if not tag:
+        raise HTTPException(status_code=404, detail="Tag bulunamadı")
+    if tag.owner_user_id != user.id and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Yetkisiz erişim")
+    return _export_response(format, f"clicks_{shortid}", tag.id, start, end)
 
 
 @app.get("/stats/{shortid}", response_class=HTMLResponse)
@@ -0,0 +1,141 @@
+# manage.py
+"""
+Bakım komutları.
+
+Kullanım:
+    python manage.py backfill-rollup [--since YYYY-MM-DD]
+    python manage.py backfill-sketches [--since YYYY-MM-DD]
+    python manage.py prune-clicks [--days N] [--no-archive] [--dry-run] [--backfill]
+    python manage.py prune-hourly [--dry-run]
+    python manage.py backfill-user-agents
+    python manage.py gc-uploads [--dry-run] [--grace SANIYE]
+    python manage.py build-assets
+"""
+import argparse
+from datetime import date
+from pathlib import Path
+
+from db import init_db
+from retention import CLICK_RETENTION_DAYS, PRUNE_BATCH_SIZE
+from storage import BLOB_GC_GRACE_SECONDS
+
+
+def cmd_backfill_rollup(args: argparse.Namespace) -> None:
+    from clicks import backfill_rollup
+
+    rows = backfill_rollup(args.since)
+    print(f"OK: ClickDaily ve ClickHourly yeniden oluşturuldu ({rows} günlük satır)")
+
+
+def cmd_backfill_sketches(args: argparse.Namespace) -> None:
+    from clicks import backfill_sketches
+
+    processed = backfill_sketches(args.since, args.batch_size)
+    print(f"OK: {processed} okutma tekil ziyaretçi taslaklarına eklendi")
+
+
+def cmd_prune_clicks(args: argparse.Namespace) -> None:
+    from retention import CLICK_ARCHIVE_DIR, prune_clicks
+
+    if not args.days:
+        raise SystemExit("Saklama süresi yok: --days verin ya da CLICK_RETENTION_DAYS ayarlayın")
+    archive_dir = None if args.no_archive else Path(args.archive_dir or CLICK_ARCHIVE_DIR)
+    try:
+        result = prune_clicks(
+            args.days, archive_dir=archive_dir, batch_size=args.batch_size, dry_run=args.dry_run, backfill=args.backfill
+        )
+    except RuntimeError as exc:
+        # Özet/taslak eksikliği: hiçbir şey silinmedi, yapılacakları göster
+        raise SystemExit(str(exc))
+    prefix = "DRY-RUN" if args.dry_run else "OK"
+    print(
+        f"{prefix}: {result.cutoff.date()} öncesi {result.deleted} okutma silindi "
+        f"({result.batches} batch, {result.archived} arşivlendi), {result.hourly_deleted} saatlik özet satırı silindi"
+    )
+    for path in result.files:
+        print(f"  {path}")
+
+
+def cmd_prune_hourly(args: argparse.Namespace) -> None:
+    from retention import prune_hourly
+
+    deleted = prune_hourly(batch_size=args.batch_size, dry_run=args.dry_run)
+    prefix = "DRY-RUN" if args.dry_run else "OK"
+    print(f"{prefix}: {deleted} eski saatlik özet satırı silindi")
+
+
+def cmd_backfill_user_agents(args: argparse.Namespace) -> None:
+    from useragents import backfill_click_user_agents
+
+    moved = backfill_click_user_agents(args.batch_size)
+    print(f"OK: {moved} okutmanın UA metni useragent tablosuna taşındı")
+    if moved:
+        print("Boşalan alanı geri kazanmak için bakım penceresinde VACUUM çalıştırabilirsiniz.")
+
+
+def cmd_gc_uploads(args: argparse.Namespace) -> None:
+    from storage import gc_blobs, upload_storage
+
+    result = gc_blobs(upload_storage, grace_seconds=args.grace, dry_run=args.dry_run)
+    prefix = "DRY-RUN" if args.dry_run else "OK"
+    print(
+        f"{prefix}: {result.blobs} blob, {result.referenced} kullanımda, "
+        f"{result.deleted_blobs} blob / {result.deleted_objects} dosya silindi"
+    )
+
+
+def cmd_build_assets(args: argparse.Namespace) -> None:
+    from assets import build_assets
+
+    manifest = build_assets()
+    for source, target in manifest.files.items():
+        print(f"{source} -> {target}")
+    print(f"OK: {len(manifest.files)} dosya, sürüm {manifest.version} ({manifest.build_dir})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Super NFC bakım komutları")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    backfill = sub.add_parser("backfill-rollup", help="Günlük ve saatlik click özetini ham kayıtlardan yeniden oluştur")
+    backfill.add_argument("--since", type=date.fromisoformat, default=None, help="Yalnızca bu günden itibaren yenile")
+    backfill.set_defaults(func=cmd_backfill_rollup)
+
+    sketches = sub.add_parser("backfill-sketches", help="Ham okutmaları tekil ziyaretçi taslaklarına ekle")
+    sketches.add_argument("--since", type=date.fromisoformat, default=None, help="Yalnızca bu günden itibaren")
+    sketches.add_argument("--batch-size", type=int, default=PRUNE_BATCH_SIZE)
+    sketches.set_defaults(func=cmd_backfill_sketches)
+
+    prune = sub.add_parser("prune-clicks", help="Eski ham okutmaları arşivle ve batch'ler halinde sil")
+    prune.add_argument("--days", type=int, default=CLICK_RETENTION_DAYS, help="Saklanacak gün sayısı")
+    prune.add_argument("--archive-dir", default=None, help="Aylık .ndjson.gz arşiv klasörü")
+    prune.add_argument("--no-archive", action="store_true", help="Arşivlemeden sil")
+    prune.add_argument("--batch-size", type=int, default=PRUNE_BATCH_SIZE)
+    prune.add_argument("--dry-run", action="store_true", help="Silmeden yalnızca say")
+    prune.add_argument("--backfill", action="store_true", help="Eksik özet/taslak günlerini silmeden önce doldur")
+    prune.set_defaults(func=cmd_prune_clicks)
+
+    hourly = sub.add_parser("prune-hourly", help="Saatlik seride gösterilmeyen eski ClickHourly satırlarını sil")
+    hourly.add_argument("--batch-size", type=int, default=PRUNE_BATCH_SIZE)
+    hourly.add_argument("--dry-run", action="store_true", help="Silmeden yalnızca say")
+    hourly.set_defaults(func=cmd_prune_hourly)
+
+    ua = sub.add_parser("backfill-user-agents", help="Eski click.ua metinlerini UA boyut tablosuna taşı")
+    ua.add_argument("--batch-size", type=int, default=PRUNE_BATCH_SIZE)
+    ua.set_defaults(func=cmd_backfill_user_agents)
+
+    gc = sub.add_parser("gc-uploads", help="Hiçbir profilin kullanmadığı yüklemeleri sil")
+    gc.add_argument("--dry-run", action="store_true", help="Silmeden yalnızca raporla")
+    gc.add_argument("--grace", type=int, default=BLOB_GC_GRACE_SECONDS, help="Bu süreden (sn) yeni dosyalara dokunma")
+    gc.set_defaults(func=cmd_gc_uploads)
+
+    build = sub.add_parser("build-assets", help="static/ dosyalarını özetle adlandır ve önceden sıkıştır")
+    build.set_defaults(func=cmd_build_assets)
+
+    args = parser.parse_args()
+    init_db()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
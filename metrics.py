@@ -0,0 +1,264 @@
+# metrics.py
+"""
+Süreç içi metrikler ve Prometheus metin biçiminde dışa aktarım (`/metrics`).
+Harici bağımlılık yoktur; sayaç/histogram güncellemesi bir kilit altında
+birkaç toplama işlemidir, okutma yolunda ölçülebilir bir maliyeti yoktur.
+
+İstek metrikleri ham yol yerine rota şablonuyla (ör. `/t/{shortid}`)
+etiketlenir; böylece etiket sayısı rota sayısıyla sınırlı kalır. Önbellek ve
+yazıcı sayaçları (`stats()` sözlükleri) dışa aktarım sırasında okunur.
+
+Not: toplu QR ZIP'in process havuzundaki üretimler bu süreçte ölçülmez.
+"""
+import bisect
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match, Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Boş değilse /metrics yalnızca `Authorization: Bearer <token>` ile okunur
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Saniye; okutma yolu için ms düzeyinde, ZIP gibi uzun istekler için saniyeler
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """
+        Prometheus metin biçiminde satırlar (HELP/TYPE başlıkları dahil).
+        """
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = self._header()
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiketler -> [kova başına (kümülatif olmayan) sayılar..., toplam, adet]
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0.0] * (len(self.buckets) + 3)
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((labels, list(state)) for labels, state in self._values.items())
+        lines = self._header()
+        names = self.labelnames + ("le",)
+        for labels, state in values:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                label_text = _format_labels(names, labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{label_text} {_format_value(cumulative)}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(state[-1])}")
+        return lines
+
+
+class Registry:
+    """
+    Metrikler ve dışa aktarım sırasında okunan `stats()` kaynakları.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._stats: List[Tuple[str, Callable[[], Dict[str, float]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_stats(self, prefix: str, source: Callable[[], Dict[str, float]]) -> None:
+        """
+        `source()` sözlüğündeki her sayı `<prefix>_<anahtar>` olarak yazılır
+        (ör. click_writer.stats -> click_writer_written).
+        """
+        self._stats.append((prefix, source))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, source in self._stats:
+            for key, value in sorted(source().items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                lines.append(f"# TYPE {name} untyped")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- Metrikler ---
+http_requests = registry.counter("http_requests_total", "HTTP istekleri", ("method", "route", "status"))
+http_duration = registry.histogram("http_request_duration_seconds", "HTTP istek süresi", ("method", "route"))
+http_in_progress = registry.gauge("http_requests_in_progress", "Sürmekte olan HTTP istekleri", ("method", "route"))
+db_sessions = registry.counter("db_sessions_total", "Açılan veritabanı oturumları", ("pool",))
+db_commit_duration = registry.histogram("db_commit_duration_seconds", "Oturum commit süresi (flush dahil)", ("pool",))
+click_flush_duration = registry.histogram("click_flush_duration_seconds", "Click yazıcısı batch yazım süresi")
+qr_render_duration = registry.histogram("qr_render_duration_seconds", "QR PNG üretim süresi (önbellek dışı)")
+template_render_duration = registry.histogram(
+    "template_render_duration_seconds", "Şablon render süresi", ("template",)
+)
+
+
+# --- İstek metrikleri ---
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(routes: Sequence, scope: Scope) -> str:
+    """
+    İsteğin eşleştiği rota şablonu. Router ile aynı eşleştirmeyi yapar;
+    yalnızca yöntemi uymayan (405) rota da kendi şablonuyla sayılır.
+    """
+    partial: Optional[str] = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.NONE:
+            continue
+        path = f"{route.path}/{{path}}" if isinstance(route, Mount) else getattr(route, "path", UNMATCHED_ROUTE)
+        if match == Match.FULL:
+            return path
+        if partial is None:
+            partial = path
+    return partial or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    İstek sayısı, süresi ve sürmekte olan istekler (rota şablonu bazında).
+    Süre yanıt gövdesinin tamamı gönderilene kadar ölçülür (akış yanıtları
+    dahil). En dışta çalışması için son eklenen middleware olmalıdır.
+    """
+
+    def __init__(self, app: ASGIApp, routes: Sequence) -> None:
+        self.app = app
+        # app.routes canlı listedir; sonradan eklenen rotalar da görülür
+        self.routes = routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = route_template(self.routes, scope)
+        status = "500"
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        http_in_progress.inc(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_duration.observe(time.perf_counter() - started, method, route)
+            http_in_progress.dec(method, route)
+            http_requests.inc(method, route, status)
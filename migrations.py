@@ -0,0 +1,265 @@
+# migrations.py
+"""
+Sürümlü şema migrasyonları. Uygulanan son sürüm `schema_version` tablosunda
+tutulur; sürüm günceldeyse açılışta yalnızca bu tablo okunur. Her
+migrasyon kendi transaction'ında uygulanır ve sürüm kaydı aynı transaction'a
+yazılır; yarıda kalan bir migrasyon bir sonraki açılışta yeniden denenir.
+
+pysqlite varsayılan olarak DDL'i (CREATE/DROP INDEX vb.) transaction dışında
+çalıştırır; bu yüzden SQLite'ta sürücünün transaction yönetimi kapatılıp
+adımlar açık `BEGIN IMMEDIATE` ile çalıştırılır. Bu aynı zamanda yazma
+kilidini baştan alır: aynı anda açılan süreçler sırayla bekler ve sürümü
+kilit altında yeniden okur (Postgres'te advisory lock).
+
+Yeni tablo ya da index eklerken buraya yeni bir sürüm ekleyin. Migrasyonlar
+idempotent yazılır: boş veritabanında create_all zaten son şemayı kurar.
+"""
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, delete, func, inspect, select, update
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+from db import (
+    SQLITE_BUSY_TIMEOUT_MS,
+    Click,
+    ClickDaily,
+    ClickHourly,
+    ClickSketch,
+    Profile,
+    Tag,
+    User,
+    engine,
+    upsert_insert,
+)
+
+logger = logging.getLogger(__name__)
+
+# Başka bir sürecin migrasyonu sürerken kilidi bekleme süresi (ms)
+MIGRATION_LOCK_TIMEOUT_MS = 10 * 60 * 1000
+# Postgres advisory lock anahtarı (süreçler arası sabit)
+_PG_LOCK_KEY = 0x5E7A_0001
+
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _add_missing_columns(conn: Connection, table: str, needed: Dict[str, str]) -> None:
+    existing = {column["name"] for column in inspect(conn).get_columns(table)}
+    for column, column_type in needed.items():
+        if column not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def _create_index(conn: Connection, name: str, table: str, columns: str, unique: bool = False) -> None:
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.exec_driver_sql(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+@contextmanager
+def _locked_transaction() -> Iterator[Connection]:
+    """
+    Yazma kilidini baştan alan ve DDL'i de kapsayan transaction.
+    """
+    with engine.connect() as conn:
+        if conn.dialect.name != "sqlite":
+            with conn.begin():
+                if conn.dialect.name == "postgresql":
+                    conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({_PG_LOCK_KEY})")
+                yield conn
+            return
+        # AUTOCOMMIT sürücünün eski (DDL'i kapsamayan) transaction yönetimini
+        # kapatır; transaction sınırları aşağıda açıkça verilir
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql(f"PRAGMA busy_timeout={MIGRATION_LOCK_TIMEOUT_MS}")
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            conn.exec_driver_sql("COMMIT")
+        finally:
+            conn.exec_driver_sql(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+
+
+# --- Migrasyonlar ---
+
+def _m001_legacy_columns(conn: Connection) -> None:
+    """
+    Eski ensure_*_columns yardımcılarının eklediği kolonlar.
+    """
+    _add_missing_columns(
+        conn,
+        "profile",
+        {
+            "full_name": "TEXT",
+            "phone": "TEXT",
+            "public_email": "TEXT",
+            "instagram": "TEXT",
+            "linkedin": "TEXT",
+            "facebook": "TEXT",
+            "whatsapp": "TEXT",
+            "iban": "TEXT",
+            "theme_color": "TEXT",
+            "updated_at": "TIMESTAMP",
+        },
+    )
+    _add_missing_columns(conn, "tag", {"batch_label": "TEXT"})
+    # Eski `ua` kolonu yerinde kalır; manage.py backfill-user-agents boşaltır
+    _add_missing_columns(conn, "click", {"ua_id": "INTEGER REFERENCES useragent(id)"})
+
+
+def _merge_tag(conn: Connection, keep: int, duplicate: int) -> None:
+    """
+    Tekrarlanan tag'in okutmalarını, özetini ve (tutulan tag'de yoksa)
+    profilini tutulan tag'e taşır.
+    """
+    conn.execute(update(Click).where(Click.tag_id == duplicate).values(tag_id=keep))
+
+    daily = conn.execute(
+        select(ClickDaily.day, ClickDaily.count).where(ClickDaily.tag_id == duplicate)
+    ).all()
+    if daily:
+        stmt = upsert_insert(conn, ClickDaily)
+        stmt = stmt.values([{"tag_id": keep, "day": day, "count": count} for day, count in daily])
+        conn.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["tag_id", "day"],
+                set_={"count": ClickDaily.__table__.c["count"] + stmt.excluded["count"]},
+            )
+        )
+        conn.execute(delete(ClickDaily).where(ClickDaily.tag_id == duplicate))
+
+    has_profile = conn.execute(select(Profile.id).where(Profile.tag_id == keep).limit(1)).first()
+    if has_profile is None:
+        latest = conn.execute(
+            select(Profile.id).where(Profile.tag_id == duplicate).order_by(Profile.updated_at.desc()).limit(1)
+        ).scalar()
+        if latest is not None:
+            conn.execute(update(Profile).where(Profile.id == latest).values(tag_id=keep))
+    conn.execute(delete(Profile).where(Profile.tag_id == duplicate))
+    conn.execute(delete(Tag).where(Tag.id == duplicate))
+
+
+def _m002_unique_shortid_email(conn: Connection) -> None:
+    """
+    Tekrarlanan shortid/e-posta satırlarını birleştirip UNIQUE index ekler.
+    Tag'lerde sahibi olan, yoksa en eski satır; kullanıcılarda en eski hesap
+    tutulur (giriş zaten ilk eşleşen hesabı kullanıyordu).
+    """
+    duplicated = conn.execute(
+        select(Tag.shortid).group_by(Tag.shortid).having(func.count(Tag.id) > 1)
+    ).scalars().all()
+    for shortid in duplicated:
+        ids = conn.execute(
+            select(Tag.id).where(Tag.shortid == shortid).order_by(Tag.owner_user_id.is_(None), Tag.id)
+        ).scalars().all()
+        for duplicate in ids[1:]:
+            _merge_tag(conn, ids[0], duplicate)
+        logger.warning("shortid %s: %d tekrar birleştirildi", shortid, len(ids) - 1)
+
+    email_key = func.lower(func.trim(User.email))
+    duplicated = conn.execute(
+        select(email_key).group_by(email_key).having(func.count(User.id) > 1)
+    ).scalars().all()
+    for email in duplicated:
+        ids = conn.execute(select(User.id).where(email_key == email).order_by(User.id)).scalars().all()
+        conn.execute(update(Tag).where(Tag.owner_user_id.in_(ids[1:])).values(owner_user_id=ids[0]))
+        conn.execute(delete(User).where(User.id.in_(ids[1:])))
+        logger.warning("e-posta %s: %d tekrar hesap birleştirildi", email, len(ids) - 1)
+
+    # create_all'un eski non-unique index'leri aynı adla UNIQUE olarak yeniden kurulur
+    for name, table, column in (("ix_tag_shortid", "tag", "shortid"), ("ix_user_email", "user", "email")):
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+        _create_index(conn, name, f'"{table}"', column, unique=True)
+
+
+def _m003_lookup_indexes(conn: Connection) -> None:
+    _create_index(conn, "ix_profile_tag_id", "profile", "tag_id")
+    _create_index(conn, "ix_tag_owner_user_id", "tag", "owner_user_id")
+    _create_index(conn, "ix_click_tag_id_timestamp", "click", "tag_id, timestamp")
+
+
+def _m004_click_sketches(conn: Connection) -> None:
+    """
+    Tekil ziyaretçi taslakları. Mevcut okutmalar için
+    `python manage.py backfill-sketches` çalıştırılmalıdır.
+    """
+    ClickSketch.__table__.create(conn, checkfirst=True)
+
+
+def _m005_click_hourly(conn: Connection) -> None:
+    """
+    Saatlik okutma özeti. Mevcut okutmalar için
+    `python manage.py backfill-rollup` çalıştırılmalıdır.
+    """
+    ClickHourly.__table__.create(conn, checkfirst=True)
+
+
+def _m006_email_case_insensitive(conn: Connection) -> None:
+    """
+    E-postalar uygulamada küçük harfle yazılıp aranır; eski satırlar da
+    normalize edilir (m002 büyük/küçük harf tekrarlarını birleştirdi) ve
+    veritabanı düzeyinde `lower(email)` üzerinde UNIQUE index eklenir.
+    """
+    conn.execute(
+        update(User)
+        .where(User.email != func.lower(func.trim(User.email)))
+        .values(email=func.lower(func.trim(User.email)))
+    )
+    _create_index(conn, "ux_user_email_lower", '"user"', "lower(email)", unique=True)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "legacy_columns", _m001_legacy_columns),
+    (2, "unique_shortid_email", _m002_unique_shortid_email),
+    (3, "lookup_indexes", _m003_lookup_indexes),
+    (4, "click_sketches", _m004_click_sketches),
+    (5, "click_hourly", _m005_click_hourly),
+    (6, "email_case_insensitive", _m006_email_case_insensitive),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return int(conn.execute(select(func.max(schema_version.c.version))).scalar() or 0)
+
+
+def migrate() -> List[int]:
+    """
+    Eksik tabloları oluşturur ve bekleyen migrasyonları sırayla uygular.
+    Uygulanan sürümleri döndürür; şema güncelse hiçbir şey yapmaz.
+    """
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version >= LATEST_VERSION:
+        return []
+
+    with _locked_transaction() as conn:
+        SQLModel.metadata.create_all(conn)
+        _metadata.create_all(conn)
+    applied: List[int] = []
+    for number, name, apply in MIGRATIONS:
+        if number <= version:
+            continue
+        with _locked_transaction() as conn:
+            if current_version(conn) >= number:
+                continue  # aynı anda açılan başka bir süreç uygulamış
+            apply(conn)
+            conn.execute(schema_version.insert().values(version=number, name=name, applied_at=datetime.utcnow()))
+        logger.info("Şema migrasyonu uygulandı: %03d_%s", number, name)
+        applied.append(number)
+    return applied
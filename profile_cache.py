@@ -0,0 +1,67 @@
+# profile_cache.py
+"""
+Anonim ziyaretçilere gösterilen /t/<shortid> sayfalarının render edilmiş HTML
+önbelleği. Girdiler shortid ile tutulur ve profil sürümüyle (updated_at +
+sahip + kök adres) doğrulanır; sürüm değişince eski HTML kendiliğinden geçersiz
+olur. Statik adresler kök-göreli (`/assets/...`) olduğundan HTML Host başlığına
+bağlı değildir; kök adres (PUBLIC_BASE_URL, ayarlı değilse istek kökü) yine de
+sürüme katılır.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "1024"))
+
+
+class RenderCache:
+    """
+    Boyutu sınırlı, thread-safe LRU önbellek: shortid -> (sürüm, HTML).
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, shortid: str, version: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(shortid)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(shortid)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, shortid: str, version: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[shortid] = (version, body)
+            self._entries.move_to_end(shortid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, shortid: str) -> None:
+        with self._lock:
+            if self._entries.pop(shortid, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+profile_cache = RenderCache(PROFILE_CACHE_SIZE)
@@ -0,0 +1,152 @@
+# profiler.py
+"""
+İstek başına SQL profili (isteğe bağlı, SQL_PROFILE=true). Motorlara takılan
+cursor olayları, o anki isteğin profiline (contextvar) sorgu sayısını ve
+süresini ekler. Aynı biçimdeki (parametreler hariç) bir sorgu bir istekte
+eşik sayısından fazla çalıştıysa N+1 olarak raporlanır.
+
+Sonuçlar yanıtın `Server-Timing` başlığına yazılır (tarayıcı geliştirici
+araçlarında görünür); eşiği aşan istekler için sorgu dökümü loglanır.
+Click yazıcısı gibi istek dışındaki iş parçacıklarının sorguları sayılmaz.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "false").lower() == "true"
+SQL_PROFILE_SLOW_MS = float(os.getenv("SQL_PROFILE_SLOW_MS", "500"))
+# Aynı sorgu biçimi bir istekte bu kadar (ya da daha çok) çalışırsa N+1 sayılır
+SQL_PROFILE_N1_THRESHOLD = int(os.getenv("SQL_PROFILE_N1_THRESHOLD", "5"))
+_REPORT_TOP = 10
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# IN (?, ?, ?) listeleri eleman sayısından bağımsız tek biçim sayılır
+_IN_LIST_RE = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    return _IN_LIST_RE.sub("(?)", _WHITESPACE_RE.sub(" ", statement).strip())
+
+
+class QueryProfile:
+    """
+    Tek bir isteğin sorgu sayısı, toplam süresi ve biçim bazında dağılımı.
+    """
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.shape_seconds: Dict[str, float] = {}
+        # Senkron handler'ların sorguları thread havuzundan gelebilir
+        self._lock = threading.Lock()
+
+    def add(self, statement: str, seconds: float) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.queries += 1
+            self.seconds += seconds
+            self.shapes[shape] += 1
+            self.shape_seconds[shape] = self.shape_seconds.get(shape, 0.0) + seconds
+
+    def repeated(self, threshold: int = SQL_PROFILE_N1_THRESHOLD) -> List[Tuple[str, int]]:
+        with self._lock:
+            return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        with self._lock:
+            top = sorted(self.shape_seconds.items(), key=lambda item: item[1], reverse=True)[:_REPORT_TOP]
+            lines = [f"  {self.shapes[shape]:>4}x {seconds * 1000:8.1f} ms  {shape[:300]}" for shape, seconds in top]
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryProfile]] = ContextVar("sql_profile", default=None)
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """
+    Motorun cursor olaylarını o anki isteğin profiline bağlar. Async motorlar
+    için `.sync_engine` verilmelidir; SQLAlchemy greenlet'leri contextvar'ı
+    çağıran görevden devralır.
+    """
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        if profile is None:
+            return
+        stack = conn.info.get("profile_started")
+        if stack:
+            profile.add(statement, time.perf_counter() - stack.pop())
+
+
+def _server_timing(profile: QueryProfile, app_seconds: float) -> str:
+    parts = [
+        f'db;dur={profile.seconds * 1000:.1f};desc="{profile.queries} queries"',
+        f"app;dur={app_seconds * 1000:.1f}",
+    ]
+    repeated = profile.repeated()
+    if repeated:
+        parts.append(f'n1;desc="{len(repeated)} repeated"')
+    return ", ".join(parts)
+
+
+class SQLProfilerMiddleware:
+    """
+    Her istek için yeni bir QueryProfile açar; yanıt başlarken Server-Timing
+    ekler, yanıt bittiğinde N+1 ve yavaş istek raporlarını loglar.
+    """
+
+    def __init__(self, app: ASGIApp, slow_ms: float = SQL_PROFILE_SLOW_MS) -> None:
+        self.app = app
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile = QueryProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", []))
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append("Server-Timing", _server_timing(profile, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            target = f"{scope['method']} {scope['path']}"
+            for shape, count in profile.repeated():
+                logger.warning("Olası N+1: %s içinde %d kez: %s", target, count, shape[:300])
+            if elapsed_ms >= self.slow_ms:
+                logger.warning(
+                    "Yavaş istek: %s %.0f ms (%d sorgu, %.0f ms veritabanı)\n%s",
+                    target,
+                    elapsed_ms,
+                    profile.queries,
+                    profile.seconds * 1000,
+                    profile.report(),
+                )
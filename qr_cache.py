@@ -0,0 +1,217 @@
+# qr_cache.py
+"""
+QR PNG'leri için içerik adresli disk önbelleği. Anahtar (hedef URL, box_size,
+border, hata düzeltme seviyesi) değerlerinin SHA-256 özetidir; aynı girdiler
+her zaman aynı dosyaya düşer. Toplam boyut sınırı aşılınca en eski kullanılan
+dosyalar silinir.
+"""
+import hashlib
+import io
+import itertools
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import qrcode
+from qrcode.image.pil import PilImage
+
+from metrics import qr_render_duration
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+QR_CACHE_DIR = Path(os.getenv("QR_CACHE_DIR", str(BASE_DIR / "cache" / "qr")))
+QR_CACHE_MAX_BYTES = int(os.getenv("QR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+ERROR_CORRECTION = qrcode.constants.ERROR_CORRECT_Q
+DEFAULT_BOX_SIZE = 10
+DEFAULT_BORDER = 4
+# Büyük seri üretimlerde arka plan ısıtması sadece ilk N tag için yapılır; kuyrukta
+# aynı anda en fazla bu kadar iş bekler, fazlası atlanır
+QR_WARM_LIMIT = int(os.getenv("QR_WARM_LIMIT", "2000"))
+
+
+def clamp_params(size: int, border: int) -> Tuple[int, int]:
+    return max(1, min(int(size), 20)), max(1, min(int(border), 10))
+
+
+def render_png(url: str, box_size: int, border: int, error_correction: int = ERROR_CORRECTION) -> bytes:
+    """
+    QR kodunu PNG olarak üretir (önbelleğe bakmaz).
+    """
+    with qr_render_duration.time():
+        qr = qrcode.QRCode(
+            version=None,
+            error_correction=error_correction,
+            box_size=box_size,
+            border=border,
+        )
+        qr.add_data(url)
+        qr.make(True)
+        img: PilImage = qr.make_image(fill_color="black", back_color="white")
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        return buf.getvalue()
+
+
+class QRCache:
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None  # ilk kullanımda diskten hesaplanır
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Tüm warm() çağrıları tek bir arka plan thread'inin kuyruğuna eklenir
+        self._warm_queue: "queue.Queue[Tuple[str, int, int]]" = queue.Queue(maxsize=max(1, QR_WARM_LIMIT))
+        self._warm_thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def key(url: str, box_size: int, border: int, error_correction: int = ERROR_CORRECTION) -> str:
+        raw = f"{url}|{box_size}|{border}|{error_correction}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.png"
+
+    def lookup(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # mtime son kullanım zamanı olarak tutulur (LRU tahliyesi için)
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def store(self, key: str, data: bytes) -> None:
+        path = self.path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+        except OSError:
+            logger.exception("QR önbelleğe yazılamadı: %s", path)
+            return
+        # Aynı anahtar eşzamanlı üretilmiş olabilir; üzerine yazılan dosyanın
+        # boyutu düşülür ki toplam şişip erken tahliye tetiklenmesin
+        with self._lock:
+            try:
+                previous = path.stat().st_size
+            except OSError:
+                previous = 0
+            try:
+                os.replace(tmp, path)
+            except OSError:
+                logger.exception("QR önbelleğe yazılamadı: %s", path)
+                return
+            if self._size is not None:
+                self._size += len(data) - previous
+        self._evict_if_needed()
+
+    def get_png(
+        self,
+        url: str,
+        box_size: int = DEFAULT_BOX_SIZE,
+        border: int = DEFAULT_BORDER,
+        error_correction: int = ERROR_CORRECTION,
+    ) -> bytes:
+        key = self.key(url, box_size, border, error_correction)
+        data = self.lookup(key)
+        if data is None:
+            data = render_png(url, box_size, border, error_correction)
+            self.store(key, data)
+        return data
+
+    def warm(self, urls: Iterable[str], box_size: int = DEFAULT_BOX_SIZE, border: int = DEFAULT_BORDER) -> None:
+        """
+        Verilen URL'lerin QR'larını arka planda üretip önbelleğe koyar. Tek bir
+        ısıtma thread'i kuyruğu boşaltır; kuyruk doluysa kalan URL'ler atlanır.
+        """
+        added = 0
+        for url in itertools.islice(urls, QR_WARM_LIMIT):
+            try:
+                self._warm_queue.put_nowait((url, box_size, border))
+            except queue.Full:
+                break
+            added += 1
+        if not added:
+            return
+        with self._lock:
+            if self._warm_thread is None:
+                self._warm_thread = threading.Thread(target=self._warm_worker, name="qr-cache-warm", daemon=True)
+                self._warm_thread.start()
+
+    def _warm_worker(self) -> None:
+        while True:
+            try:
+                url, box_size, border = self._warm_queue.get(timeout=1.0)
+            except queue.Empty:
+                with self._lock:
+                    if self._warm_queue.empty():
+                        self._warm_thread = None
+                        return
+                continue
+            key = self.key(url, box_size, border)
+            if self.path(key).exists():
+                continue
+            try:
+                self.store(key, render_png(url, box_size, border))
+            except Exception:
+                logger.exception("QR ısıtma başarısız: %s", url)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": self._size or 0,
+            }
+
+    # --- Tahliye ---
+
+    def _files(self) -> List[os.DirEntry]:
+        entries: List[os.DirEntry] = []
+        if not self.root.exists():
+            return entries
+        for bucket in os.scandir(self.root):
+            if bucket.is_dir():
+                entries.extend(e for e in os.scandir(bucket.path) if e.name.endswith(".png"))
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(e.stat().st_size for e in self._files())
+            if not self.max_bytes or self._size <= self.max_bytes:
+                return
+            # Her seferinde tek dosya silmek yerine %90'a kadar boşalt
+            target = int(self.max_bytes * 0.9)
+            files = sorted(self._files(), key=lambda e: e.stat().st_mtime)
+            size = sum(e.stat().st_size for e in files)
+            for entry in files:
+                if size <= target:
+                    break
+                try:
+                    file_size = entry.stat().st_size
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                size -= file_size
+                self.evictions += 1
+            self._size = size
+
+
+qr_cache = QRCache(QR_CACHE_DIR, QR_CACHE_MAX_BYTES)
@@ -0,0 +1,144 @@
+# qr_zip.py
+"""
+Toplu QR ZIP çıktısı. QR'lar bir process havuzunda paralel üretilir, ZIP
+akış olarak yazılır: önceki dosyaların baytları istemciye giderken sonrakiler
+hâlâ üretilmektedir. Bellekte aynı anda yalnızca sınırlı sayıda PNG tutulur.
+"""
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import AsyncIterator, Deque, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import iterate_in_threadpool
+
+from qr_cache import qr_cache, render_png
+
+QR_ZIP_WORKERS = int(os.getenv("QR_ZIP_WORKERS", str(os.cpu_count() or 2)))
+# Sıradaki kaç PNG'nin önceden üretilebileceği (bellek sınırı)
+QR_ZIP_WINDOW = int(os.getenv("QR_ZIP_WINDOW", str(QR_ZIP_WORKERS * 4)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # fork, ana süreçteki thread'lerle (click yazıcısı vb.) güvenli değil
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, QR_ZIP_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+class _StreamSink(io.RawIOBase):
+    """
+    ZipFile için seek desteklemeyen yazma hedefi; yazılan baytlar drain()
+    ile alınıp istemciye gönderilir.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _rendered(
+    items: Iterable[Tuple[str, str]], box_size: int, border: int
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    (dosya adı, URL) çiftlerini sırayı koruyarak (dosya adı, PNG) olarak üretir.
+    Önbellekte olanlar doğrudan okunur, olmayanlar havuza gönderilir. Üretici
+    erken kapatılırsa (istemci bağlantıyı kesti) penceredeki henüz
+    başlamamış işler iptal edilir.
+    """
+    window: Deque[Tuple[str, str, Optional[bytes], Optional[Future]]] = deque()
+    pool: Optional[ProcessPoolExecutor] = None
+
+    def _pop() -> Tuple[str, bytes]:
+        name, key, png, future = window.popleft()
+        if png is None:
+            assert future is not None
+            png = future.result()
+            qr_cache.store(key, png)
+        return name, png
+
+    try:
+        for name, url in items:
+            key = qr_cache.key(url, box_size, border)
+            png = qr_cache.lookup(key)
+            future = None
+            if png is None:
+                pool = pool or get_pool()
+                future = pool.submit(render_png, url, box_size, border)
+            window.append((name, key, png, future))
+            if len(window) >= max(1, QR_ZIP_WINDOW):
+                yield _pop()
+        while window:
+            yield _pop()
+    finally:
+        for _, _, _, future in window:
+            if future is not None:
+                future.cancel()
+        window.clear()
+
+
+def iter_qr_zip(items: Iterable[Tuple[str, str]], box_size: int, border: int) -> Iterator[bytes]:
+    """
+    ZIP arşivini parça parça üretir. PNG zaten sıkıştırılmış olduğundan
+    girdiler ZIP_STORED ile yazılır.
+    """
+    sink = _StreamSink()
+    rendered = _rendered(items, box_size, border)
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            for name, png in rendered:
+                archive.writestr(name, png)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+    finally:
+        # Bağlantı kesilince (GeneratorExit) bekleyen QR işleri havuzu meşgul etmesin
+        rendered.close()
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+async def stream_qr_zip(items: Iterable[Tuple[str, str]], box_size: int, border: int) -> AsyncIterator[bytes]:
+    """
+    StreamingResponse gövdesi. Starlette, istemci bağlantıyı kesince senkron
+    üreticiyi kapatmaz (ancak sonraki bir çöp toplamada kapanır); burada
+    hemen kapatılır ki penceredeki bekleyen QR işleri iptal edilsin. İptal
+    anında worker thread'i bitmeden bu blok çalışmadığı için close() güvenlidir.
+    """
+    chunks = iter_qr_zip(items, box_size, border)
+    try:
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+    finally:
+        chunks.close()
@@ -0,0 +1,242 @@
+# retention.py
+"""
+Ham Click kayıtları için saklama politikası. `days` günden eski okutmalar
+(isteğe bağlı olarak) ay başına gzip'li NDJSON dosyalarına arşivlenir ve
+küçük batch'ler halinde silinir. İstatistikler ClickDaily özetinden (tekil
+ziyaretçiler ClickSketch'ten) okunduğu için silinen günlerin sayıları
+kaybolmaz; silmeden önce silinecek her (tag, gün) için özetin ve taslağın
+bulunduğu doğrulanır.
+
+Tarama birincil anahtar sırasıyla yapılır (okutmalar zaman sırasıyla eklenir),
+böylece zaman kolonu üzerinde ayrı bir index gerekmez. Her silme batch'i kendi
+kısa transaction'ındadır; yazma kilidi uzun süre tutulmaz ve click yazıcısı
+batch'ler arasında çalışmaya devam eder.
+
+Saatlik özet (ClickHourly) yalnızca son HOURLY_MAX_DAYS gün için okunur;
+daha eski saat satırları `prune_hourly` ile (prune-clicks de çağırır) silinir.
+"""
+import gzip
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as dt_time, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select, tuple_
+
+from db import Click, ClickDaily, ClickHourly, ClickSketch, UserAgent, engine
+from stats import HOURLY_MAX_DAYS
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+# 0: saklama politikası kapalı (prune-clicks --days ile yine çalıştırılabilir)
+CLICK_RETENTION_DAYS = int(os.getenv("CLICK_RETENTION_DAYS", "0"))
+CLICK_ARCHIVE_DIR = Path(os.getenv("CLICK_ARCHIVE_DIR", str(BASE_DIR / "archive" / "clicks")))
+PRUNE_BATCH_SIZE = int(os.getenv("PRUNE_BATCH_SIZE", "5000"))
+# Batch'ler arasında yazıcıya ve diğer yazmalara fırsat vermek için bekleme (sn)
+PRUNE_PAUSE = float(os.getenv("PRUNE_PAUSE", "0.05"))
+
+
+def retention_cutoff(days: int, now: Optional[datetime] = None) -> datetime:
+    """
+    Saklanacak ilk günün başlangıcı (UTC). Kesim gün sınırında yapılır; böylece
+    bir gün ya tamamen ham kayıtlarla ya da yalnızca özetle temsil edilir.
+    """
+    today = (now or datetime.utcnow()).date()
+    return datetime.combine(today - timedelta(days=max(0, days) - 1), dt_time.min)
+
+
+@dataclass
+class PruneResult:
+    cutoff: datetime
+    scanned: int = 0
+    deleted: int = 0
+    archived: int = 0
+    batches: int = 0
+    hourly_deleted: int = 0
+    files: List[str] = field(default_factory=list)
+
+
+def _archive(rows: List[Dict], archive_dir: Path, result: PruneResult) -> None:
+    """
+    Satırları ay dosyalarına ekler. Her çağrı gzip dosyasına yeni bir üye
+    ekler; gzip/zcat birleşik üyeleri tek akış olarak okur. Silme bu yazımdan
+    sonra yapıldığı için yarıda kesilen bir çalıştırma tekrarlandığında aynı
+    satırlar tekrar yazılabilir; `id` alanı ile ayıklanabilir.
+    """
+    by_month: Dict[str, List[Dict]] = defaultdict(list)
+    for row in rows:
+        by_month[row["timestamp"].strftime("%Y-%m")].append(row)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    for month, items in sorted(by_month.items()):
+        path = archive_dir / f"clicks-{month}.ndjson.gz"
+        payload = "".join(
+            json.dumps({**item, "timestamp": item["timestamp"].isoformat()}, ensure_ascii=False) + "\n"
+            for item in items
+        )
+        with open(path, "ab") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as out:
+            out.write(payload.encode("utf-8"))
+            out.flush()
+            raw.flush()
+            os.fsync(raw.fileno())
+        if str(path) not in result.files:
+            result.files.append(str(path))
+        result.archived += len(items)
+
+
+def prune_hourly(
+    days: int = HOURLY_MAX_DAYS, batch_size: int = PRUNE_BATCH_SIZE, pause: float = PRUNE_PAUSE, dry_run: bool = False
+) -> int:
+    """
+    Saatlik seride artık gösterilemeyecek (son `days` günden eski) ClickHourly
+    satırlarını kısa batch'ler halinde siler; silinen satır sayısını döndürür.
+    """
+    cutoff = retention_cutoff(max(days, HOURLY_MAX_DAYS))
+    if dry_run:
+        with engine.connect() as conn:
+            return int(
+                conn.execute(select(func.count()).select_from(ClickHourly).where(ClickHourly.hour < cutoff)).scalar()
+                or 0
+            )
+    deleted = 0
+    while True:
+        with engine.begin() as conn:
+            keys = conn.execute(
+                select(ClickHourly.tag_id, ClickHourly.hour).where(ClickHourly.hour < cutoff).limit(max(1, batch_size))
+            ).all()
+            if not keys:
+                break
+            conn.execute(
+                delete(ClickHourly).where(tuple_(ClickHourly.tag_id, ClickHourly.hour).in_([tuple(key) for key in keys]))
+            )
+        deleted += len(keys)
+        if len(keys) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def rollup_gaps(cutoff: datetime) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Kesimden önceki ham okutmalar için özeti eksik (ClickDaily satırı yok ya da
+    ham sayıdan küçük) ve taslağı olmayan ilk günler. Eski sürümden yükseltilen
+    veritabanlarında özet yalnızca yükseltmeden sonraki günleri kapsar.
+    """
+    day = func.date(Click.timestamp)
+    raw = (
+        select(Click.tag_id.label("tag_id"), day.label("day"), func.count(Click.id).label("count"))
+        .where(Click.timestamp < cutoff)
+        .group_by(Click.tag_id, day)
+        .subquery()
+    )
+    joined = (
+        select(raw.c.day)
+        .select_from(raw)
+        .outerjoin(ClickDaily, and_(ClickDaily.tag_id == raw.c.tag_id, ClickDaily.day == raw.c.day))
+        .outerjoin(ClickSketch, and_(ClickSketch.tag_id == raw.c.tag_id, ClickSketch.day == raw.c.day))
+    )
+    with engine.connect() as conn:
+        rollup_gap = conn.execute(
+            joined.with_only_columns(func.min(raw.c.day)).where(
+                or_(ClickDaily.count.is_(None), ClickDaily.count < raw.c.count)
+            )
+        ).scalar()
+        sketch_gap = conn.execute(
+            joined.with_only_columns(func.min(raw.c.day)).where(ClickSketch.tag_id.is_(None))
+        ).scalar()
+    return _as_date(rollup_gap), _as_date(sketch_gap)
+
+
+def prune_clicks(
+    days: int,
+    archive_dir: Optional[Path] = CLICK_ARCHIVE_DIR,
+    batch_size: int = PRUNE_BATCH_SIZE,
+    pause: float = PRUNE_PAUSE,
+    dry_run: bool = False,
+    backfill: bool = False,
+) -> PruneResult:
+    """
+    `days` günden eski ham okutmaları arşivleyip (archive_dir None değilse)
+    siler. Çalışan uygulamayla birlikte güvenle çalıştırılabilir. Silinecek
+    aralıkta özeti ya da taslağı eksik gün varsa `backfill` ile önce bunlar
+    ham kayıtlardan doldurulur; aksi halde hiçbir şey silinmeden hata verilir.
+    """
+    if days < 1:
+        raise ValueError("days en az 1 olmalıdır")
+    cutoff = retention_cutoff(days)
+    result = PruneResult(cutoff=cutoff)
+
+    rollup_gap, sketch_gap = rollup_gaps(cutoff)
+    if (rollup_gap or sketch_gap) and backfill and not dry_run:
+        from clicks import backfill_rollup, backfill_sketches
+
+        if rollup_gap:
+            backfill_rollup(since=rollup_gap)
+        if sketch_gap:
+            backfill_sketches(since=sketch_gap)
+        rollup_gap, sketch_gap = rollup_gaps(cutoff)
+    if rollup_gap or sketch_gap:
+        # Eksik günlerin ham kaydı silinirse istatistikleri kalıcı olarak 0 olur
+        first = min(day for day in (rollup_gap, sketch_gap) if day)
+        raise RuntimeError(
+            f"{first} gününden itibaren özet/taslak eksik; `--backfill` ile çalıştırın ya da önce "
+            f"`python manage.py backfill-rollup --since {first}` ve `backfill-sketches --since {first}`"
+        )
+
+    # Arşivde UA, id yerine metin olarak tutulur (boyut tablosundan bağımsız okunabilsin)
+    columns = [Click.id, Click.tag_id, Click.timestamp, Click.ip, UserAgent.ua]
+    last_id = 0
+    while True:
+        # Okuma yazma kilidi almaz; yalnızca silme kısa bir transaction açar
+        with engine.connect() as conn:
+            rows = [
+                dict(row._mapping)
+                for row in conn.execute(
+                    select(*columns)
+                    .outerjoin(UserAgent, UserAgent.id == Click.ua_id)
+                    .where(Click.id > last_id)
+                    .order_by(Click.id)
+                    .limit(max(1, batch_size))
+                )
+            ]
+        if not rows:
+            break
+        old = [row for row in rows if row["timestamp"] < cutoff]
+        result.scanned += len(rows)
+        last_id = rows[-1]["id"]
+        if old and not dry_run:
+            if archive_dir is not None:
+                _archive(old, archive_dir, result)
+            ids = [row["id"] for row in old]
+            with engine.begin() as conn:
+                conn.execute(delete(Click).where(Click.id.in_(ids)))
+            result.deleted += len(ids)
+            result.batches += 1
+        elif old:
+            result.deleted += len(old)
+        if len(old) < len(rows):
+            break  # kesimden yeni kayıtlara ulaşıldı
+        if pause and not dry_run:
+            time.sleep(pause)
+    result.hourly_deleted = prune_hourly(batch_size=batch_size, pause=pause, dry_run=dry_run)
+    logger.info(
+        "Click saklama: %d silindi, %d arşivlendi, %d saatlik özet silindi (kesim %s)",
+        result.deleted,
+        result.archived,
+        result.hourly_deleted,
+        cutoff.isoformat(),
+    )
+    return result
+
@@ -0,0 +1,217 @@
+# stats.py
+"""
+İstatistik okuma sorguları. Ham Click tablosu yerine ClickDaily özetini
+kullanır; maliyet ömür boyu okutma sayısına değil istenen gün sayısına bağlıdır.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import and_
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from db import Click, ClickDaily, ClickHourly, ClickSketch, Tag, User, UserAgent
+from hll import merge_sketches
+
+
+def window_start(days: int) -> date:
+    return datetime.utcnow().date() - timedelta(days=days - 1)
+
+
+def fill_series(counts: Dict[Hashable, int], buckets: Sequence[Hashable]) -> List[int]:
+    """
+    Kovalara hizalı seri; sayısı olmayan kovalar 0 olur.
+    """
+    return [int(counts.get(bucket, 0)) for bucket in buckets]
+
+
+def fill_days(by_day: Dict[date, int], start: date, days: int) -> Tuple[List[str], List[int]]:
+    """
+    Eksik günleri 0 ile doldurup (etiketler, değerler) döndürür.
+    """
+    buckets = [start + timedelta(days=i) for i in range(days)]
+    return [day.isoformat() for day in buckets], fill_series(by_day, buckets)
+
+
+async def daily_series(session: AsyncSession, tag_id: int, days: int) -> Tuple[List[str], List[int]]:
+    start = window_start(days)
+    rows = (await session.exec(
+        select(ClickDaily.day, ClickDaily.count).where(
+            ClickDaily.tag_id == tag_id, ClickDaily.day >= start
+        )
+    )).all()
+    return fill_days({row[0]: row[1] for row in rows}, start, days)
+
+
+async def unique_visitors(session: AsyncSession, tag_id: int, days: int) -> int:
+    """
+    Son `days` günün yaklaşık tekil ziyaretçi sayısı: günlük taslaklar
+    birleştirilip tek tahmin yapılır (aynı kişi farklı günlerde bir kez sayılır).
+    """
+    start = window_start(days)
+    sketches = (await session.exec(
+        select(ClickSketch.registers).where(ClickSketch.tag_id == tag_id, ClickSketch.day >= start)
+    )).all()
+    if not sketches:
+        return 0
+    return merge_sketches(sketches).count()
+
+
+# --- Çoklu tag serileri ---
+
+STATS_BATCH_MAX_IDS = int(os.getenv("STATS_BATCH_MAX_IDS", "200"))
+GRANULARITIES = ("hour", "day", "week")
+# Saatlik seri en fazla bu kadar gün kapsar (24 * 14 nokta)
+HOURLY_MAX_DAYS = 14
+
+Bucket = Union[date, datetime]
+
+
+def series_buckets(granularity: str, days: int, now: Optional[datetime] = None) -> List[Bucket]:
+    """
+    Son `days` günü kapsayan kova başlangıçları (UTC). Haftalar pazartesi
+    başlar; ilk hafta pencerenin başladığı günün haftasıdır.
+    """
+    now = now or datetime.utcnow()
+    start = now.date() - timedelta(days=days - 1)
+    if granularity == "hour":
+        first = datetime.combine(start, datetime.min.time())
+        current = now.replace(minute=0, second=0, microsecond=0)
+        return [first + timedelta(hours=i) for i in range(int((current - first).total_seconds() // 3600) + 1)]
+    if granularity == "week":
+        first = start - timedelta(days=start.weekday())
+        return [first + timedelta(weeks=i) for i in range((now.date() - first).days // 7 + 1)]
+    return [start + timedelta(days=i) for i in range(days)]
+
+
+def bucket_label(bucket: Bucket) -> str:
+    if isinstance(bucket, datetime):
+        return bucket.strftime("%Y-%m-%dT%H:00")
+    return bucket.isoformat()
+
+
+async def batch_series(
+    session: AsyncSession, tag_ids: Sequence[int], granularity: str, days: int
+) -> Tuple[List[str], Dict[int, List[int]]]:
+    """
+    Birden fazla tag için hizalı seriler tek sorguyla: saatlik ClickHourly'den,
+    günlük/haftalık ClickDaily'den okunur (hafta toplamı Python'da). Tüm
+    tag'ler aynı etiket dizisini paylaşır; okutması olmayan kovalar 0'dır.
+    """
+    buckets = series_buckets(granularity, days)
+    counts: Dict[int, Dict[Bucket, int]] = {tag_id: {} for tag_id in tag_ids}
+    if granularity == "hour":
+        rows = (await session.exec(
+            select(ClickHourly.tag_id, ClickHourly.hour, ClickHourly.count).where(
+                ClickHourly.tag_id.in_(tag_ids), ClickHourly.hour >= buckets[0]
+            )
+        )).all()
+    else:
+        window_first = window_start(days)
+        rows = (await session.exec(
+            select(ClickDaily.tag_id, ClickDaily.day, ClickDaily.count).where(
+                ClickDaily.tag_id.in_(tag_ids), ClickDaily.day >= window_first
+            )
+        )).all()
+    for tag_id, bucket, count in rows:
+        if granularity == "week":
+            bucket = bucket - timedelta(days=bucket.weekday())
+        by_bucket = counts[tag_id]
+        by_bucket[bucket] = by_bucket.get(bucket, 0) + int(count)
+    labels = [bucket_label(bucket) for bucket in buckets]
+    return labels, {tag_id: fill_series(by_bucket, buckets) for tag_id, by_bucket in counts.items()}
+
+
+@dataclass
+class TagSummary:
+    id: int
+    shortid: str
+    created_at: datetime
+    count: int = 0
+    sparkline: List[int] = field(default_factory=list)
+
+
+@dataclass
+class OwnerSummary:
+    email: Optional[str] = None
+    tags: List[TagSummary] = field(default_factory=list)
+
+
+async def owner_summary(session: AsyncSession, user_id: int, days: int = 7) -> OwnerSummary:
+    """
+    Kullanıcı, tag'leri, toplam okutmaları ve son `days` günün seri değerleri
+    tek sorguda: user LEFT JOIN tag LEFT JOIN son günlerin özet satırları.
+    Toplam, tag başına (tag_id, day) anahtarı üzerinden korele alt sorgudur.
+    """
+    start = window_start(days)
+    lifetime = aliased(ClickDaily)
+    total = (
+        select(func.coalesce(func.sum(lifetime.count), 0))
+        .where(lifetime.tag_id == Tag.id)
+        .correlate(Tag)
+        .scalar_subquery()
+    )
+    rows = (await session.exec(
+        select(User.email, Tag.id, Tag.shortid, Tag.created_at, total, ClickDaily.day, ClickDaily.count)
+        .select_from(User)
+        .outerjoin(Tag, Tag.owner_user_id == User.id)
+        .outerjoin(ClickDaily, and_(ClickDaily.tag_id == Tag.id, ClickDaily.day >= start))
+        .where(User.id == user_id)
+        .order_by(Tag.created_at, Tag.id)
+    )).all()
+
+    summary = OwnerSummary()
+    by_tag: Dict[int, Tuple[TagSummary, Dict[date, int]]] = {}
+    for email, tag_id, shortid, created_at, tag_total, day, count in rows:
+        summary.email = email
+        if tag_id is None:
+            continue
+        if tag_id not in by_tag:
+            item = TagSummary(id=tag_id, shortid=shortid, created_at=created_at, count=int(tag_total or 0))
+            by_tag[tag_id] = (item, {})
+            summary.tags.append(item)
+        if day is not None:
+            by_tag[tag_id][1][day] = int(count or 0)
+    for item, by_day in by_tag.values():
+        item.sparkline = fill_days(by_day, start, days)[1]
+    return summary
+
+
+@dataclass
+class DeviceBreakdown:
+    device: List[Dict] = field(default_factory=list)
+    os: List[Dict] = field(default_factory=list)
+    browser: List[Dict] = field(default_factory=list)
+    total: int = 0
+
+
+async def device_breakdown(session: AsyncSession, tag_id: int, days: int) -> DeviceBreakdown:
+    """
+    Ham okutmalar üzerinden cihaz / işletim sistemi / tarayıcı dağılımı.
+    Tek GROUP BY: (tag_id, timestamp) index'iyle aralık taranır, UA boyut
+    tablosuyla tamsayı id üzerinden birleştirilir; kırılımlar Python'da toplanır.
+    """
+    start = datetime.combine(window_start(days), datetime.min.time())
+    rows = (await session.exec(
+        select(UserAgent.device, UserAgent.os, UserAgent.browser, func.count(Click.id))
+        .select_from(Click)
+        .outerjoin(UserAgent, UserAgent.id == Click.ua_id)
+        .where(Click.tag_id == tag_id, Click.timestamp >= start)
+        .group_by(UserAgent.device, UserAgent.os, UserAgent.browser)
+    )).all()
+
+    counters: Dict[str, Dict[str, int]] = {"device": {}, "os": {}, "browser": {}}
+    result = DeviceBreakdown()
+    for device, os_name, browser, count in rows:
+        for dimension, value in (("device", device), ("os", os_name), ("browser", browser)):
+            key = value or "other"  # UA başlığı olmayan okutmalar
+            counters[dimension][key] = counters[dimension].get(key, 0) + int(count)
+        result.total += int(count)
+    for dimension, counts in counters.items():
+        ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        setattr(result, dimension, [{"name": name, "count": count} for name, count in ordered])
+    return result
@@ -0,0 +1,367 @@
+# storage.py
+"""
+Yüklenen dosyalar için içerik adresli blob deposu. Nesne adları
+`<içerik özeti>-<varyant>` biçimindedir; aynı içerik bir kez saklanır ve adı
+hiç değişmediği için URL'ler süresiz önbelleklenebilir. Hangi profilin hangi
+blob'u kullandığı `Blob.refcount` ile izlenir, kullanılmayanları `gc_blobs`
+siler.
+
+Depo UPLOAD_STORAGE ile seçilir: `local` (varsayılan, UPLOAD_DIR altında) veya
+`s3` (boto3 ve S3 uyumlu bir servis gerekir). Testlerde (tests/test_storage.py)
+ObjectStoreBlobStorage InMemoryObjectClient ile çalıştırılır.
+"""
+import logging
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from db import Blob, Profile, engine, upsert_insert
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", str(Path(__file__).parent / "uploads")))
+UPLOAD_STORAGE = os.getenv("UPLOAD_STORAGE", "local").strip().lower()
+UPLOAD_BUCKET = os.getenv("UPLOAD_BUCKET", "")
+# s3 için blob'ların herkese açık adresi (ör. CDN); local'de /uploads
+UPLOAD_PUBLIC_URL = os.getenv("UPLOAD_PUBLIC_URL", "").rstrip("/")
+# Referansı kalmayan blob'lar bu süre dolmadan silinmez (devam eden yüklemeler için)
+BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+
+BLOB_KEY_LENGTH = 16
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_OBJECT_NAME_RE = re.compile(r"^([0-9a-f]{%d})-[\w.]+$" % BLOB_KEY_LENGTH)
+
+
+def blob_key(name_or_url: Optional[str]) -> Optional[str]:
+    """
+    Nesne adından veya URL'inden blob anahtarını çıkarır; içerik adresli
+    olmayan (eski) dosyalar için None.
+    """
+    name = (name_or_url or "").rsplit("/", 1)[-1]
+    match = _OBJECT_NAME_RE.match(name)
+    return match.group(1) if match else None
+
+
+class BlobStorage(ABC):
+    """
+    Depo arayüzü. Nesneler değişmez kabul edilir: aynı ada ikinci yazma
+    içerik aynı olduğu için atlanabilir, ancak nesnenin değişiklik zamanı
+    yenilenmelidir (touch); aksi halde gc_blobs yeniden kullanılmaya başlanan
+    eski bir nesneyi silebilir.
+    """
+
+    @abstractmethod
+    def put(self, name: str, data: bytes, content_type: str) -> None: ...
+
+    @abstractmethod
+    def touch(self, name: str) -> None:
+        """
+        Nesnenin son değişiklik zamanını şimdiye çeker.
+        """
+
+    @abstractmethod
+    def exists(self, name: str) -> bool: ...
+
+    @abstractmethod
+    def delete(self, name: str) -> None: ...
+
+    @abstractmethod
+    def list(self) -> Iterator[Tuple[str, datetime]]:
+        """
+        (nesne adı, son değişiklik zamanı UTC) çiftleri.
+        """
+
+    @abstractmethod
+    def url(self, name: str) -> str: ...
+
+
+class LocalBlobStorage(BlobStorage):
+    def __init__(self, root: Path, base_url: str = "/uploads") -> None:
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, name: str) -> Path:
+        if "/" in name or name.startswith("."):
+            raise ValueError(f"Geçersiz nesne adı: {name}")
+        return self.root / name
+
+    def put(self, name: str, data: bytes, content_type: str) -> None:
+        path = self._path(name)
+        if path.exists():
+            self.touch(name)
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def touch(self, name: str) -> None:
+        try:
+            os.utime(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, name: str) -> bool:
+        return self._path(name).exists()
+
+    def delete(self, name: str) -> None:
+        self._path(name).unlink(missing_ok=True)
+
+    def list(self) -> Iterator[Tuple[str, datetime]]:
+        if not self.root.exists():
+            return
+        for entry in os.scandir(self.root):
+            if entry.is_file() and not entry.name.startswith("."):
+                yield entry.name, datetime.fromtimestamp(entry.stat().st_mtime, tz=timezone.utc)
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+
+class ObjectStoreBlobStorage(BlobStorage):
+    """
+    S3 uyumlu depo. `client` boto3 S3 istemcisinin put_object, head_object,
+    copy_object, delete_object ve list_objects_v2 çağrılarını sağlamalıdır.
+    """
+
+    def __init__(self, client, bucket: str, base_url: str, prefix: str = "") -> None:
+        self.client = client
+        self.bucket = bucket
+        self.base_url = base_url.rstrip("/")
+        self.prefix = prefix
+
+    def put(self, name: str, data: bytes, content_type: str) -> None:
+        if self.exists(name):
+            self.touch(name)
+            return
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + name,
+            Body=data,
+            ContentType=content_type,
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+        )
+
+    def touch(self, name: str) -> None:
+        # S3'te nesneyi kendi üzerine kopyalamak LastModified'ı yeniler; bunun
+        # için meta veri yeniden verilmelidir (REPLACE)
+        key = self.prefix + name
+        head = self.client.head_object(Bucket=self.bucket, Key=key)
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE",
+            ContentType=head.get("ContentType", "application/octet-stream"),
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+        )
+
+    def exists(self, name: str) -> bool:
+        # head_object'in "bulunamadı" hatası istemciye göre değiştiği için listeleme
+        response = self.client.list_objects_v2(Bucket=self.bucket, Prefix=self.prefix + name, MaxKeys=1)
+        return any(item["Key"] == self.prefix + name for item in response.get("Contents", []))
+
+    def delete(self, name: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + name)
+
+    def list(self) -> Iterator[Tuple[str, datetime]]:
+        token = None
+        while True:
+            kwargs = {"Bucket": self.bucket, "Prefix": self.prefix}
+            if token:
+                kwargs["ContinuationToken"] = token
+            response = self.client.list_objects_v2(**kwargs)
+            for item in response.get("Contents", []):
+                yield item["Key"][len(self.prefix):], item["LastModified"]
+            if not response.get("IsTruncated"):
+                return
+            token = response.get("NextContinuationToken")
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{self.prefix}{name}"
+
+
+class InMemoryObjectClient:
+    """
+    Testler ve yerel deneme için boto3 S3 istemcisinin kullanılan alt kümesi.
+    """
+
+    def __init__(self, page_size: int = 1000) -> None:
+        self.objects: Dict[Tuple[str, str], Tuple[bytes, Dict[str, str], datetime]] = {}
+        self.page_size = page_size
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **metadata) -> Dict:
+        with self._lock:
+            self.objects[(Bucket, Key)] = (bytes(Body), metadata, datetime.now(timezone.utc))
+        return {}
+
+    def get_object(self, Bucket: str, Key: str) -> Dict:
+        with self._lock:
+            body, metadata, modified = self.objects[(Bucket, Key)]
+        return {"Body": body, "LastModified": modified, **metadata}
+
+    def head_object(self, Bucket: str, Key: str) -> Dict:
+        with self._lock:
+            _, metadata, modified = self.objects[(Bucket, Key)]
+        return {"LastModified": modified, **metadata}
+
+    def copy_object(self, Bucket: str, Key: str, CopySource: Dict[str, str], MetadataDirective: str = "COPY", **metadata) -> Dict:
+        with self._lock:
+            body, old_metadata, _ = self.objects[(CopySource["Bucket"], CopySource["Key"])]
+            new_metadata = metadata if MetadataDirective == "REPLACE" else old_metadata
+            self.objects[(Bucket, Key)] = (body, new_metadata, datetime.now(timezone.utc))
+        return {}
+
+    def delete_object(self, Bucket: str, Key: str) -> Dict:
+        with self._lock:
+            self.objects.pop((Bucket, Key), None)
+        return {}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", MaxKeys: int = 0, ContinuationToken: str = "") -> Dict:
+        with self._lock:
+            keys = sorted(k for b, k in self.objects if b == Bucket and k.startswith(Prefix) and k > ContinuationToken)
+            limit = min(MaxKeys or self.page_size, self.page_size)
+            page = keys[:limit]
+            contents = [{"Key": k, "LastModified": self.objects[(Bucket, k)][2]} for k in page]
+        response = {"Contents": contents, "IsTruncated": len(keys) > limit}
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+
+def create_storage(upload_dir: Path = UPLOAD_DIR) -> BlobStorage:
+    if UPLOAD_STORAGE == "s3":
+        try:
+            import boto3
+        except ImportError as exc:  # pragma: no cover - isteğe bağlı bağımlılık
+            raise RuntimeError("UPLOAD_STORAGE=s3 için boto3 kurulmalıdır") from exc
+        if not UPLOAD_BUCKET or not UPLOAD_PUBLIC_URL:
+            raise RuntimeError("UPLOAD_STORAGE=s3 için UPLOAD_BUCKET ve UPLOAD_PUBLIC_URL gerekir")
+        return ObjectStoreBlobStorage(boto3.client("s3"), UPLOAD_BUCKET, UPLOAD_PUBLIC_URL)
+    return LocalBlobStorage(upload_dir, UPLOAD_PUBLIC_URL or "/uploads")
+
+
+upload_storage = create_storage()
+
+
+class UploadStaticFiles(StaticFiles):
+    """
+    Yerel depodaki içerik adresli nesneleri `immutable` olarak sunar; içerik
+    değişince ad da değiştiği için tarayıcının doğrulama yapmasına gerek yoktur.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if blob_key(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+# --- Referans sayımı ---
+
+async def retain_blob(session: AsyncSession, key: str) -> None:
+    """
+    Blob'a bir referans ekler; çağıranın transaction'ı içinde çalışır.
+    """
+    now = datetime.utcnow()
+    stmt = upsert_insert(session.bind, Blob).values(key=key, refcount=1, created_at=now, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"refcount": Blob.__table__.c.refcount + 1, "updated_at": now},
+    )
+    await session.exec(stmt)
+
+
+async def release_blob(session: AsyncSession, key: str) -> None:
+    await session.exec(
+        update(Blob)
+        .where(Blob.key == key, Blob.refcount > 0)
+        .values(refcount=Blob.refcount - 1, updated_at=datetime.utcnow())
+    )
+
+
+async def swap_blob_reference(session: AsyncSession, old_url: Optional[str], new_url: Optional[str]) -> None:
+    old_key, new_key = blob_key(old_url), blob_key(new_url)
+    if old_key == new_key:
+        return
+    if new_key:
+        await retain_blob(session, new_key)
+    if old_key:
+        await release_blob(session, old_key)
+
+
+# --- Çöp toplama ---
+
+@dataclass
+class GCResult:
+    blobs: int = 0
+    referenced: int = 0
+    deleted_objects: int = 0
+    deleted_blobs: int = 0
+
+
+def gc_blobs(storage: BlobStorage, grace_seconds: int = BLOB_GC_GRACE_SECONDS, dry_run: bool = False) -> GCResult:
+    """
+    Referans sayılarını profillerden yeniden hesaplar (sayaç kaymasını ve
+    tablodan önceki yüklemeleri düzeltir), sonra hiçbir profilin kullanmadığı
+    ve `grace_seconds` süresinden eski nesneleri siler.
+    """
+    result = GCResult()
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    with engine.begin() as conn:
+        urls = conn.execute(select(Profile.image_url).where(Profile.image_url.is_not(None))).scalars()
+        counts = Counter(key for key in map(blob_key, urls) if key)
+        result.referenced = len(counts)
+        if not dry_run:
+            now = datetime.utcnow()
+            conn.execute(update(Blob).values(refcount=0))
+            for key, count in counts.items():
+                stmt = upsert_insert(conn, Blob).values(key=key, refcount=count, created_at=now, updated_at=now)
+                conn.execute(stmt.on_conflict_do_update(index_elements=["key"], set_={"refcount": count}))
+
+    doomed: Dict[str, List[str]] = {}
+    for name, modified in storage.list():
+        key = blob_key(name)
+        if not key:
+            continue  # içerik adresli olmayan eski yüklemelere dokunulmaz
+        doomed.setdefault(key, [])
+        if key not in counts and modified < cutoff:
+            doomed[key].append(name)
+    result.blobs = len(doomed)
+
+    for key, names in doomed.items():
+        if not names:
+            continue
+        for name in names:
+            if not dry_run:
+                try:
+                    storage.delete(name)
+                except Exception:
+                    logger.exception("Blob silinemedi: %s", name)
+                    continue
+            result.deleted_objects += 1
+        result.deleted_blobs += 1
+
+    if not dry_run and result.deleted_blobs:
+        deleted_keys = [key for key, names in doomed.items() if names]
+        with engine.begin() as conn:
+            for start in range(0, len(deleted_keys), 500):
+                conn.execute(
+                    delete(Blob).where(Blob.key.in_(deleted_keys[start:start + 500]), Blob.refcount <= 0)
+                )
+    return result
@@ -0,0 +1,34 @@
+# tests/conftest.py
+"""
+Testler geçici bir SQLite dosyası ve yükleme dizini üzerinde çalışır. Ortam
+değişkenleri uygulama modülleri import edilmeden önce ayarlanmalıdır.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+_WORKDIR = Path(tempfile.mkdtemp(prefix="super-nfc-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_WORKDIR / 'test.db'}"
+os.environ["UPLOAD_DIR"] = str(_WORKDIR / "uploads")
+os.environ["QR_CACHE_DIR"] = str(_WORKDIR / "qr")
+os.environ.setdefault("SECRET_KEY", "test")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from db import engine, init_db  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    """
+    Şema bir kez kurulur; her testten önce tüm tablolar boşaltılır.
+    """
+    init_db()
+    with engine.begin() as conn:
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            conn.execute(table.delete())
+    yield
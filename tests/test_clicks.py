@@ -0,0 +1,111 @@
+# tests/test_clicks.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import func
+
+import clicks
+import retention
+from db import Click, ClickDaily, Tag, engine, get_session
+
+
+def _seed_clicks(days: int, per_day: int = 3) -> None:
+    with get_session() as session:
+        session.add(Tag(shortid="abc"))
+        session.commit()
+        tag_id = session.exec(select(Tag.id)).one()[0]
+    now = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    rows = [
+        {"tag_id": tag_id, "timestamp": now - timedelta(days=d, minutes=m), "ip": "1.2.3.4", "ua": None}
+        for d in range(days)
+        for m in range(per_day)
+    ]
+    rows.sort(key=lambda row: row["timestamp"])  # id sırası zaman sırası olsun (saklama taraması)
+    with engine.begin() as conn:
+        conn.execute(insert(Click), [{k: v for k, v in row.items() if k != "ua"} for row in rows])
+        clicks.apply_rollup(conn, rows)
+        clicks.apply_sketches(conn, rows)
+
+
+def _daily_total() -> int:
+    with engine.connect() as conn:
+        return int(conn.execute(select(func.sum(ClickDaily.count))).scalar() or 0)
+
+
+def test_backfill_rollup_keeps_pruned_days_with_older_since(tmp_path):
+    _seed_clicks(days=30)
+    assert _daily_total() == 90
+
+    result = retention.prune_clicks(10, archive_dir=tmp_path, batch_size=7, pause=0)
+    assert result.deleted == 60
+    assert _daily_total() == 90
+
+    since = (datetime.utcnow() - timedelta(days=60)).date()
+    assert clicks.backfill_rollup(since) == 10
+    assert _daily_total() == 90
+
+
+def test_backfill_rollup_without_raw_clicks_is_noop(tmp_path):
+    _seed_clicks(days=5)
+    retention.prune_clicks(1, archive_dir=tmp_path, pause=0)
+    with engine.begin() as conn:
+        conn.execute(Click.__table__.delete())
+
+    assert clicks.backfill_rollup((datetime.utcnow() - timedelta(days=30)).date()) == 0
+    assert _daily_total() == 15
+
+
+def _writer_with_failures(monkeypatch, failures: int, retries: int) -> clicks.ClickWriter:
+    writer = clicks.ClickWriter(batch_size=10, max_delay=0.05, queue_size=100, retries=retries, backoff=0)
+    real_write = writer._write
+    calls = {"n": 0}
+
+    def flaky_write(rows):
+        calls["n"] += 1
+        if calls["n"] <= failures:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        real_write(rows)
+
+    monkeypatch.setattr(writer, "_write", flaky_write)
+    return writer
+
+
+def _count_clicks() -> int:
+    with engine.connect() as conn:
+        return int(conn.execute(select(func.count()).select_from(Click)).scalar())
+
+
+def test_click_writer_retries_transient_errors(monkeypatch):
+    with get_session() as session:
+        tag = Tag(shortid="abc")
+        session.add(tag)
+        session.commit()
+    writer = _writer_with_failures(monkeypatch, failures=2, retries=3)
+    for _ in range(5):
+        writer.record(tag.id, "1.2.3.4", "Mozilla/5.0")
+    writer.stop()
+
+    stats = writer.stats()
+    assert stats["written"] == 5
+    assert stats["retried"] == 2
+    assert stats["failed"] == 0
+    assert _count_clicks() == 5
+
+
+def test_click_writer_counts_failed_batch_after_retries(monkeypatch):
+    with get_session() as session:
+        tag = Tag(shortid="abc")
+        session.add(tag)
+        session.commit()
+    writer = _writer_with_failures(monkeypatch, failures=10, retries=2)
+    for _ in range(3):
+        writer.record(tag.id, "1.2.3.4", None)
+    writer.stop()
+
+    stats = writer.stats()
+    assert stats["written"] == 0
+    assert stats["retried"] == 2
+    assert stats["failed"] == 3
+    assert stats["dropped"] == 0
+    assert _count_clicks() == 0
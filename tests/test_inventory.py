@@ -0,0 +1,40 @@
+# tests/test_inventory.py
+import pytest
+from sqlalchemy import select
+
+import inventory
+from db import Tag, get_session
+
+
+def test_bulk_generate_retries_colliding_shortids(monkeypatch):
+    with get_session() as session:
+        session.add_all([Tag(shortid="aaaa"), Tag(shortid="bbbb")])
+        session.commit()
+    # İlk parçanın üç adayından ikisi mevcut tag'lerle çakışır; eksikler yeni adaylarla tamamlanır
+    candidates = iter(["aaaa", "bbbb", "cccc", "aaaa", "dddd", "eeee", "ffff"])
+    monkeypatch.setattr(inventory, "generate_shortid", lambda length=8: next(candidates))
+
+    created = inventory.bulk_generate(3, length=4, batch_size=3)
+
+    assert sorted(created) == ["cccc", "dddd", "eeee"]
+    with get_session() as session:
+        shortids = sorted(session.exec(select(Tag.shortid)).scalars())
+    assert shortids == ["aaaa", "bbbb", "cccc", "dddd", "eeee"]
+
+
+def test_bulk_generate_commits_each_batch(monkeypatch):
+    candidates = iter(["aaaa", "bbbb", "cccc", "dddd"])
+
+    def generate(length=8):
+        try:
+            return next(candidates)
+        except StopIteration:
+            raise RuntimeError("üretim kesildi")
+
+    monkeypatch.setattr(inventory, "generate_shortid", generate)
+    with pytest.raises(RuntimeError):
+        inventory.bulk_generate(6, length=4, batch_size=2)
+
+    with get_session() as session:
+        shortids = sorted(session.exec(select(Tag.shortid)).scalars())
+    assert shortids == ["aaaa", "bbbb", "cccc", "dddd"]
@@ -0,0 +1,32 @@
+# tests/test_qr_cache.py
+import threading
+import time
+
+from qr_cache import QRCache
+
+
+def test_store_overwrite_counts_size_once(tmp_path):
+    cache = QRCache(tmp_path, max_bytes=10_000)
+    cache.store("ab" * 32, b"x" * 100)
+    cache.store("ab" * 32, b"y" * 100)
+    cache.store("ab" * 32, b"z" * 150)
+    cache.store("cd" * 32, b"w" * 50)
+
+    assert cache.stats()["bytes"] == 200
+    assert cache.stats()["evictions"] == 0
+
+
+def test_warm_reuses_single_worker(tmp_path):
+    cache = QRCache(tmp_path, max_bytes=0)
+    urls = [f"https://example.com/t/{i}" for i in range(5)]
+    for _ in range(4):
+        cache.warm(urls)
+
+    warmers = [t for t in threading.enumerate() if t.name == "qr-cache-warm"]
+    assert len(warmers) == 1
+
+    deadline = time.monotonic() + 10
+    while cache._warm_thread is not None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert cache._warm_thread is None
+    assert all(cache.path(cache.key(url, 10, 4)).exists() for url in urls)
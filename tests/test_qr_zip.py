@@ -0,0 +1,65 @@
+# tests/test_qr_zip.py
+import asyncio
+from concurrent.futures import Future
+
+from starlette.responses import StreamingResponse
+
+import qr_zip
+
+
+class _PendingPool:
+    """
+    İlk `ready` işi hemen tamamlayan, gerisini başlamamış bırakan havuz.
+    """
+
+    def __init__(self, ready: int) -> None:
+        self.ready = ready
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        if len(self.futures) < self.ready:
+            future.set_result(b"png")
+        self.futures.append(future)
+        return future
+
+
+def test_closing_stream_cancels_pending_renders(monkeypatch):
+    pool = _PendingPool(ready=1)
+    monkeypatch.setattr(qr_zip, "get_pool", lambda: pool)
+    monkeypatch.setattr(qr_zip, "QR_ZIP_WINDOW", 4)
+    items = [(f"{i}.png", f"https://example.com/t/close-{i}") for i in range(10)]
+
+    stream = qr_zip.iter_qr_zip(items, 10, 4)
+    assert next(stream)
+    stream.close()
+
+    assert len(pool.futures) == 4
+    assert pool.futures[0].done() and not pool.futures[0].cancelled()
+    assert all(future.cancelled() for future in pool.futures[1:])
+
+
+def test_client_disconnect_cancels_pending_renders(monkeypatch):
+    pool = _PendingPool(ready=1)
+    monkeypatch.setattr(qr_zip, "get_pool", lambda: pool)
+    monkeypatch.setattr(qr_zip, "QR_ZIP_WINDOW", 4)
+    items = [(f"{i}.png", f"https://example.com/t/disconnect-{i}") for i in range(10)]
+
+    async def run() -> None:
+        first_chunk = asyncio.Event()
+
+        async def send(message):
+            if message.get("body"):
+                first_chunk.set()
+
+        async def receive():
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        response = StreamingResponse(qr_zip.stream_qr_zip(items, 10, 4))
+        await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+
+    asyncio.run(run())
+
+    assert len(pool.futures) == 4
+    assert all(future.cancelled() for future in pool.futures[1:])
@@ -0,0 +1,98 @@
+# tests/test_storage.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from db import Blob, Profile, Tag, get_async_session, get_session
+from storage import InMemoryObjectClient, ObjectStoreBlobStorage, gc_blobs, swap_blob_reference
+
+KEY = "0123456789abcdef"
+NAME = f"{KEY}-256.webp"
+
+
+def _object_store(page_size: int = 1000):
+    client = InMemoryObjectClient(page_size=page_size)
+    return client, ObjectStoreBlobStorage(client, "bucket", "https://cdn.example.com", prefix="avatars/")
+
+
+def _age(client: InMemoryObjectClient, name: str, seconds: int) -> None:
+    key = ("bucket", "avatars/" + name)
+    body, metadata, _ = client.objects[key]
+    client.objects[key] = (body, metadata, datetime.now(timezone.utc) - timedelta(seconds=seconds))
+
+
+def _swap(profile_id: int, old_url, new_url) -> None:
+    async def run():
+        async with get_async_session() as session:
+            profile = await session.get(Profile, profile_id)
+            await swap_blob_reference(session, old_url, new_url)
+            profile.image_url = new_url
+            session.add(profile)
+            await session.commit()
+
+    asyncio.run(run())
+
+
+def _refcount(key: str):
+    with get_session() as session:
+        blob = session.get(Blob, key)
+        return blob.refcount if blob else None
+
+
+def test_object_store_put_exists_and_touch():
+    client, storage = _object_store()
+    assert not storage.exists(NAME)
+
+    storage.put(NAME, b"image", "image/webp")
+    assert storage.exists(NAME)
+    assert storage.url(NAME) == f"https://cdn.example.com/avatars/{NAME}"
+    assert client.get_object(Bucket="bucket", Key="avatars/" + NAME)["CacheControl"].endswith("immutable")
+
+    # Aynı içerik yeniden yüklenince nesne yazılmaz ama LastModified yenilenir
+    _age(client, NAME, 7200)
+    storage.put(NAME, b"other", "image/webp")
+    head = client.get_object(Bucket="bucket", Key="avatars/" + NAME)
+    assert head["Body"] == b"image"
+    assert head["ContentType"] == "image/webp"
+    assert head["LastModified"] > datetime.now(timezone.utc) - timedelta(seconds=60)
+
+
+def test_object_store_list_pages():
+    _, storage = _object_store(page_size=2)
+    names = [f"{i:016x}-256.webp" for i in range(5)]
+    for name in names:
+        storage.put(name, b"x", "image/webp")
+    assert sorted(name for name, _ in storage.list()) == names
+
+
+def test_gc_deletes_released_blob_after_grace():
+    client, storage = _object_store()
+    storage.put(NAME, b"image", "image/webp")
+    kept = "fedcba9876543210-256.webp"
+    storage.put(kept, b"kept", "image/webp")
+    with get_session() as session:
+        tag = Tag(shortid="abc")
+        session.add(tag)
+        session.commit()
+        profile = Profile(tag_id=tag.id)
+        other = Profile(tag_id=tag.id, image_url=storage.url(kept))
+        session.add_all([profile, other])
+        session.commit()
+
+    _swap(profile.id, None, storage.url(NAME))
+    assert _refcount(KEY) == 1
+    _swap(profile.id, storage.url(NAME), None)
+    assert _refcount(KEY) == 0
+
+    # Süre dolmadan referanssız blob da silinmez
+    result = gc_blobs(storage, grace_seconds=3600)
+    assert result.deleted_blobs == 0
+    assert storage.exists(NAME)
+
+    _age(client, NAME, 7200)
+    _age(client, kept, 7200)
+    result = gc_blobs(storage, grace_seconds=3600)
+    assert result.deleted_blobs == 1
+    assert not storage.exists(NAME)
+    assert storage.exists(kept)
+    assert _refcount(KEY) is None
+    assert _refcount("fedcba9876543210") == 1
@@ -0,0 +1,174 @@
+# useragents.py
+"""
+User-Agent boyut tablosu. Ham UA metni her okutmada tekrar saklanmaz; metin
+bir kez UserAgent tablosuna (özet -> id) yazılır, cihaz / işletim sistemi /
+tarayıcı ayrıştırılır ve Click yalnızca küçük tamsayı `ua_id` tutar. Sık
+görülen UA'lar süreç içinde önbelleklenir; click yazıcısının batch'i çoğu
+zaman veritabanına UA sorgusu atmadan çözülür.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import inspect, select, text
+
+from db import Click, UserAgent, engine, upsert_insert
+
+UA_CACHE_SIZE = int(os.getenv("UA_CACHE_SIZE", "20000"))
+# Daha uzun başlıklar kesilir (bazı botlar KB'larca UA gönderir)
+UA_MAX_LENGTH = 512
+
+_BOT_RE = re.compile(r"bot|crawl|spider|slurp|facebookexternalhit|preview|curl|wget|python-|httpx|okhttp", re.I)
+_TABLET_RE = re.compile(r"ipad|tablet|kindle|silk|playbook|(android(?!.*mobile))", re.I)
+_MOBILE_RE = re.compile(r"mobi|iphone|ipod|android|windows phone|blackberry|opera mini", re.I)
+
+# Sıra önemlidir: Edge/Opera/Samsung UA'ları "Chrome" da içerir
+_OS_RULES = (
+    ("iOS", re.compile(r"iphone|ipad|ipod|cpu (iphone )?os \d", re.I)),
+    ("Android", re.compile(r"android", re.I)),
+    ("Windows", re.compile(r"windows", re.I)),
+    ("ChromeOS", re.compile(r"cros", re.I)),
+    ("macOS", re.compile(r"mac os x|macintosh", re.I)),
+    ("Linux", re.compile(r"linux|x11", re.I)),
+)
+_BROWSER_RULES = (
+    ("Edge", re.compile(r"edg(e|a|ios)?/", re.I)),
+    ("Opera", re.compile(r"opr/|opera", re.I)),
+    ("Samsung Internet", re.compile(r"samsungbrowser", re.I)),
+    ("Instagram", re.compile(r"instagram", re.I)),
+    ("Facebook", re.compile(r"fban|fbav", re.I)),
+    ("Firefox", re.compile(r"firefox|fxios", re.I)),
+    ("Chrome", re.compile(r"chrome|crios", re.I)),
+    ("Safari", re.compile(r"safari", re.I)),
+)
+
+
+def normalize_ua(ua: Optional[str]) -> Optional[str]:
+    value = (ua or "").strip()
+    return value[:UA_MAX_LENGTH] or None
+
+
+def ua_hash(ua: str) -> str:
+    return hashlib.sha256(ua.encode("utf-8", "replace")).hexdigest()[:32]
+
+
+@lru_cache(maxsize=4096)
+def parse_user_agent(ua: str) -> Tuple[str, str, str]:
+    """
+    (cihaz sınıfı, işletim sistemi, tarayıcı). Kaba ama bağımlılıksız bir
+    sınıflandırma; istatistik kırılımı için yeterlidir.
+    """
+    if _BOT_RE.search(ua):
+        device = "bot"
+    elif _TABLET_RE.search(ua):
+        device = "tablet"
+    elif _MOBILE_RE.search(ua):
+        device = "mobile"
+    elif ua:
+        device = "desktop"
+    else:
+        device = "other"
+    os_name = next((name for name, rule in _OS_RULES if rule.search(ua)), "other")
+    browser = next((name for name, rule in _BROWSER_RULES if rule.search(ua)), "other")
+    return device, os_name, browser
+
+
+class UserAgentInterner:
+    """
+    UA metni -> UserAgent.id eşlemesi için boyutu sınırlı LRU önbellek.
+    Yeni id'ler yalnızca transaction commit edildikten sonra önbelleğe
+    alınır (remember); geri alınan bir batch önbelleği kirletmez.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, conn, uas: Iterable[str]) -> Dict[str, int]:
+        """
+        Verilen UA'ların id'lerini döndürür; eksikleri tek INSERT ... ON
+        CONFLICT DO NOTHING ve tek IN sorgusuyla tabloya ekler.
+        """
+        resolved: Dict[str, int] = {}
+        missing: Dict[str, str] = {}
+        with self._lock:
+            for ua in set(uas):
+                ua_id = self._ids.get(ua)
+                if ua_id is None:
+                    missing[ua_hash(ua)] = ua
+                    self.misses += 1
+                else:
+                    self._ids.move_to_end(ua)
+                    resolved[ua] = ua_id
+                    self.hits += 1
+        if not missing:
+            return resolved
+
+        now = datetime.utcnow()
+        rows = []
+        for digest, ua in missing.items():
+            device, os_name, browser = parse_user_agent(ua)
+            rows.append(
+                {"hash": digest, "ua": ua, "device": device, "os": os_name, "browser": browser, "created_at": now}
+            )
+        conn.execute(upsert_insert(conn, UserAgent).values(rows).on_conflict_do_nothing(index_elements=["hash"]))
+        for ua_id, digest in conn.execute(
+            select(UserAgent.id, UserAgent.hash).where(UserAgent.hash.in_(list(missing)))
+        ):
+            resolved[missing[digest]] = ua_id
+        return resolved
+
+    def remember(self, mapping: Dict[str, int]) -> None:
+        with self._lock:
+            for ua, ua_id in mapping.items():
+                self._ids[ua] = ua_id
+                self._ids.move_to_end(ua)
+            while len(self._ids) > self.max_entries:
+                self._ids.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._ids), "hits": self.hits, "misses": self.misses}
+
+
+ua_interner = UserAgentInterner(UA_CACHE_SIZE)
+
+
+def backfill_click_user_agents(batch_size: int = 5000) -> int:
+    """
+    Eski şemadan kalan `click.ua` metinlerini UserAgent tablosuna taşır,
+    `ua_id`'yi doldurur ve metni NULL yapar. Her batch kendi kısa
+    transaction'ındadır. Taşınan satır sayısını döndürür.
+    """
+    columns = {column["name"] for column in inspect(engine).get_columns(Click.__tablename__)}
+    if "ua" not in columns:
+        return 0
+    moved = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text("SELECT id, ua FROM click WHERE id > :last AND ua IS NOT NULL ORDER BY id LIMIT :n"),
+                {"last": last_id, "n": max(1, batch_size)},
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            normalized = {row_id: normalize_ua(ua) for row_id, ua in rows}
+            mapping = ua_interner.resolve(conn, {ua for ua in normalized.values() if ua})
+            # `ua` artık modelde olmadığı için düz SQL
+            conn.execute(
+                text("UPDATE click SET ua_id = :ua_id, ua = NULL WHERE id = :id"),
+                [{"id": row_id, "ua_id": mapping.get(ua) if ua else None} for row_id, ua in normalized.items()],
+            )
+        ua_interner.remember(mapping)
+        moved += len(rows)
+    return moved